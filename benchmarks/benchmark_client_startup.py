@@ -0,0 +1,64 @@
+#
+# == Wormhole Client Startup Benchmark ==
+#
+# Measures the cold-start time (process start until the first frame is received)
+# and peak memory usage of a viewer process, using WormholeClient().view() and Wormhole().view().
+#
+# Usage: python benchmarks/benchmark_client_startup.py [runs]
+#
+
+import subprocess
+import sys
+import time
+
+PORT = 8123
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+SERVER_SCRIPT = f"""
+import numpy as np
+from wormhole import Wormhole
+from wormhole.video import CustomVideo
+server = Wormhole(port={PORT})
+video = CustomVideo(640, 360, 30)
+video.set_frame(np.zeros((360, 640, 3), np.uint8))
+server.stream_video(video)
+print("ready", flush=True)
+server.join()
+"""
+
+VIEWER_SCRIPTS = {
+    "WormholeClient().view()": "from wormhole import WormholeClient\nvideo = WormholeClient().view('localhost:{port}')",
+    "Wormhole().view()": "from wormhole import Wormhole\nvideo = Wormhole(port={port} + 1).view('localhost:{port}')",
+}
+
+# Wait for the first frame, then report the peak memory usage
+VIEWER_FOOTER = """
+import resource, time
+while video.frame_version == 0:
+    time.sleep(0.001)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, flush=True)
+"""
+
+
+def run_viewer(script: str):
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", script + VIEWER_FOOTER], capture_output=True, text=True, timeout=60)
+    elapsed = time.perf_counter() - start
+    max_rss = int(output.stdout.strip().splitlines()[-1])
+    return elapsed, max_rss
+
+
+if __name__ == "__main__":
+    server = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        if server.stdout.readline().strip() != "ready":
+            raise Exception("Benchmark Server Failed to Start!")
+        time.sleep(1)
+
+        for name, script in VIEWER_SCRIPTS.items():
+            results = [run_viewer(script.format(port=PORT)) for _ in range(RUNS)]
+            average_time = sum(r[0] for r in results) / RUNS
+            average_rss = sum(r[1] for r in results) / RUNS
+            print(f"{name:<28} Cold Start: {average_time * 1000:>8.1f} ms  Max RSS: {average_rss / 1024:>7.1f} MB")
+    finally:
+        server.kill()
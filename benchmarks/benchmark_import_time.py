@@ -0,0 +1,65 @@
+#
+# == Wormhole Import Time Benchmark ==
+#
+# Measures how long each common way of importing Wormhole takes using `python -X importtime`,
+# and fails if any of them import a heavy dependency that they do not need.
+#
+# Usage: python benchmarks/benchmark_import_time.py [runs]
+#
+
+import re
+import subprocess
+import sys
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+SERVER_MODULES = ["flask", "flask_socketio", "flask_cors"]
+CLIENT_MODULES = ["socketio", "requests"]
+VIDEO_MODULES = ["cv2", "numpy"]
+
+# Import Statement -> Modules that should not be imported by it
+SCENARIOS = {
+    "import wormhole": SERVER_MODULES + CLIENT_MODULES + VIDEO_MODULES,
+    "from wormhole import WormholeClient": SERVER_MODULES + CLIENT_MODULES + VIDEO_MODULES,
+    "from wormhole.video import FileVideo, write_video": SERVER_MODULES + CLIENT_MODULES,
+    "from wormhole.viewer import MJPEGViewer": SERVER_MODULES + CLIENT_MODULES,
+    "from wormhole.viewer import RawJPEGViewer": SERVER_MODULES,
+    "from wormhole.streamer import MJPEGStreamer": ["flask_socketio", "flask_cors"] + CLIENT_MODULES,
+    "from wormhole import Wormhole": [],
+}
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+# Import the statement in a fresh interpreter. Returns the total import time (in us) and the set of imported modules
+def measure_import(statement: str):
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True)
+    if output.returncode != 0:
+        raise Exception(f"Failed to run {statement}! {output.stderr[-1000:]}")
+
+    total_time = 0
+    modules = set()
+    for line in output.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.add(name)
+        # Only count top level imports, as nested imports are already included in their cumulative time
+        if len(indent) == 1:
+            total_time += int(cumulative)
+    return total_time, modules
+
+
+if __name__ == "__main__":
+    failed = False
+    for statement, forbidden_modules in SCENARIOS.items():
+        results = [measure_import(statement) for _ in range(RUNS)]
+        best_time = min(result[0] for result in results)
+        imported = [module for module in forbidden_modules if module in results[0][1]]
+
+        status = "OK" if not imported else f"FAIL (imports {', '.join(imported)})"
+        print(f"{statement:<52} {best_time / 1000:>8.1f} ms  {status}")
+        failed = failed or bool(imported)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,83 @@
+#
+# == Wormhole MJPEG Parser Benchmark ==
+#
+# Compares the multipart MJPEG parser used by BufferedMJPEGViewer
+# with the old marker-scanning parser, using a 4K stream held in memory.
+#
+# Usage: python benchmarks/benchmark_mjpeg_parser.py [frames]
+#
+
+from wormhole.viewer.mjpegviewer import MJPEGStreamParser
+
+import cv2
+import io
+import sys
+import time
+import numpy as np
+
+WIDTH, HEIGHT = 3840, 2160
+BOUNDARY = "WORMHOLE"
+FRAMES = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+
+# Create a multipart stream the same way MJPEGStreamer does
+def create_stream(frame_count: int, content_length: bool = True):
+    # Smooth gradient with some noise, so the JPEG size is similar to a real 4K frame
+    x = np.linspace(0, 255, WIDTH, dtype=np.float32)
+    y = np.linspace(0, 255, HEIGHT, dtype=np.float32)[:, None]
+    rng = np.random.default_rng(0)
+    stream = io.BytesIO()
+    for i in range(frame_count):
+        frame = np.dstack(np.broadcast_arrays((x + y + i) % 256, (x * 0.5 + i) % 256, (y * 0.5) % 256)).astype(np.uint8)
+        frame[::16, ::16] = rng.integers(0, 255, frame[::16, ::16].shape, dtype=np.uint8)
+        _, jpg = cv2.imencode(".jpg", frame)
+        stream.write(b"--" + BOUNDARY.encode("ascii") + b"\r\nContent-Type: image/jpeg\r\n")
+        if content_length:
+            stream.write(b"Content-Length: " + str(len(jpg)).encode("ascii") + b"\r\n")
+        stream.write(b"\r\n" + jpg.tobytes() + b"\r\n")
+    stream.write(b"--" + BOUNDARY.encode("ascii") + b"--\r\n")
+    return stream.getvalue()
+
+
+# The old BufferedMJPEGViewer parser
+def legacy_parser(stream, read_buffer_size: int = 1024):
+    inBytes = bytes()
+    while True:
+        data = stream.read(read_buffer_size)
+        if not data:
+            return
+        inBytes += data
+        a = inBytes.find(b'\xff\xd8')
+        b = inBytes.find(b'\xff\xd9')
+        if a != -1 and b != -1:
+            jpg = inBytes[a:b + 2]
+            inBytes = inBytes[b + 2:]
+            yield np.frombuffer(jpg, dtype=np.uint8)
+
+
+def new_parser(stream):
+    for jpg in MJPEGStreamParser(stream, boundary=BOUNDARY, read_buffer_size=1024):
+        yield np.frombuffer(jpg, dtype=np.uint8)
+
+
+def benchmark(name: str, parser, data: bytes, decode: bool = False):
+    start = time.perf_counter()
+    parts = 0
+    for jpg in parser(io.BufferedReader(io.BytesIO(data))):
+        if decode:
+            cv2.imdecode(jpg, cv2.IMREAD_COLOR)
+        parts += 1
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {parts:>4} frames {elapsed * 1000 / max(parts, 1):>10.2f} ms/frame")
+
+
+if __name__ == "__main__":
+    print(f"Creating {FRAMES} {WIDTH}x{HEIGHT} frames...")
+    data = create_stream(FRAMES)
+    data_without_length = create_stream(FRAMES, content_length=False)
+    print(f"Average JPEG Size: {len(data) / FRAMES / 1024:.0f} KB")
+
+    benchmark("Legacy Parser (1024 byte reads)", legacy_parser, data)
+    benchmark("Multipart Parser (Content-Length)", new_parser, data)
+    benchmark("Multipart Parser (Boundary Only)", new_parser, data_without_length)
+    benchmark("Multipart Parser + imdecode", new_parser, data, decode=True)
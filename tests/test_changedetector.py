@@ -0,0 +1,50 @@
+import time
+
+import cv2
+import numpy as np
+
+from wormhole.streamer.abstractstreamer import FrameChangeDetector
+
+
+class StubVideo:
+    """Minimal video with a frame that can be updated by the test."""
+
+    def __init__(self, frame):
+        self.height, self.width = frame.shape[:2]
+        self.frame = frame
+        self.frame_version = 0
+
+    def publish(self, frame):
+        self.frame = frame
+        self.frame_version += 1
+
+    def get_derived(self, size, color):
+        return cv2.resize(cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY), size, interpolation=cv2.INTER_AREA)
+
+
+def test_same_frame_is_skipped_then_kept_alive():
+    video = StubVideo(np.zeros((64, 64, 3), dtype=np.uint8))
+    detector = FrameChangeDetector(video, change_threshold=0.5, keepalive_interval=0.05)
+
+    assert detector.check() == "frame"
+    assert detector.check() is None
+
+    time.sleep(0.06)
+    assert detector.check() == "keepalive"
+
+
+def test_sub_threshold_change_is_sent_on_keepalive():
+    video = StubVideo(np.zeros((64, 64, 3), dtype=np.uint8))
+    detector = FrameChangeDetector(video, change_threshold=0.5, keepalive_interval=0.05)
+    assert detector.check() == "frame"
+
+    # A small lasting change, below the change threshold
+    video.publish(np.full((64, 64, 3), 0, dtype=np.uint8))
+    video.frame[:2, :2] = 255
+    assert detector.check() is None
+
+    # The changed frame must be sent within the keepalive interval, and only once
+    time.sleep(0.06)
+    assert detector.check() == "frame"
+    time.sleep(0.06)
+    assert detector.check() == "keepalive"
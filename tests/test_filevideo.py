@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+from wormhole.video.filevideo import FileVideo
+
+
+class LyingCapture:
+    """Video capture that under-reports the number of frames in the file."""
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return 2
+        return 0
+
+
+def make_cached_video(cache_mode, cache_size=1024 * 1024):
+    # Only set up the state used by the frame cache, without starting any threads
+    video = FileVideo.__new__(FileVideo)
+    video.filename = "lying.mp4"
+    video.cap = LyingCapture()
+    video.cache_mode = cache_mode
+    video.cache_size = cache_size
+    video.cache_file = None
+    video.cache_enabled = True
+    video.cache_complete = False
+    video.cache_frames = []
+    video.cache_target = None
+    video.cache_timestamps = []
+    return video
+
+
+def test_mmap_cache_grows_past_reported_frame_count():
+    video = make_cached_video("mmap")
+    frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(10)]
+
+    for i, frame in enumerate(frames):
+        video.add_to_cache(i * 10.0, frame)
+    video.finish_cache()
+
+    assert video.cache_enabled
+    assert len(video.cache_frames) == len(frames)
+    for cached, frame in zip(video.cache_frames, frames):
+        assert np.array_equal(cached, frame)
+
+
+def test_mmap_cache_disabled_past_cache_size():
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+    video = make_cached_video("mmap", cache_size=frame.nbytes * 5)
+
+    for i in range(10):
+        video.add_to_cache(i * 10.0, frame)
+
+    assert not video.cache_enabled
@@ -0,0 +1,28 @@
+from wormhole.utils import FilterChain
+
+import numpy as np
+
+
+# Apply each filter as its own chain, so no filters are fused together
+def apply_unfused(filters, frame):
+    for f in filters:
+        frame = FilterChain([f]).apply(frame)
+    return frame
+
+
+def test_crop_of_crop_is_clamped_to_first_crop():
+    filters = [("crop", 0, 0, 100, 100), ("crop", 50, 50, 100, 100)]
+    assert FilterChain.compile_filters(filters) == [("crop", (50, 50, 50, 50))]
+
+
+def test_crop_of_crop_matches_unfused_crops():
+    frame = np.random.default_rng(0).integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    for filters in [
+        [("crop", 0, 0, 100, 100), ("crop", 50, 50, 100, 100)],
+        [("crop", 20, 10, 200, 150), ("crop", 30, 40, 60, 50)],
+        [("crop", 10, 10, 80, 60), ("crop", 70, 50, 40, 40), ("crop", 5, 5, 10, 10)],
+    ]:
+        fused = FilterChain(filters).apply(frame)
+        unfused = apply_unfused(filters, frame)
+        assert fused.shape == unfused.shape
+        assert (fused == unfused).all()
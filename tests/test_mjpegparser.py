@@ -0,0 +1,28 @@
+import io
+
+from wormhole.viewer.mjpegviewer import MJPEGStreamParser
+
+
+def make_part(payload, content_length=True):
+    headers = b"Content-Type: image/jpeg\r\n"
+    if content_length:
+        headers += b"Content-Length: " + str(len(payload)).encode() + b"\r\n"
+    return b"--frame\r\n" + headers + b"\r\n" + payload + b"\r\n"
+
+
+def test_parts_with_known_boundary():
+    stream = io.BytesIO(make_part(b"first") + make_part(b"second") + b"--frame--\r\n")
+    parts = [bytes(part) for part in MJPEGStreamParser(stream, boundary="frame")]
+    assert parts == [b"first", b"second"]
+
+
+def test_unknown_boundary_after_leading_line_break():
+    stream = io.BytesIO(b"\r\n" + make_part(b"first") + make_part(b"second"))
+    parts = [bytes(part) for part in MJPEGStreamParser(stream)]
+    assert parts == [b"first", b"second"]
+
+
+def test_unknown_boundary_without_content_length():
+    stream = io.BytesIO(b"\r\n" + make_part(b"first", False) + make_part(b"second", False) + b"--frame--\r\n")
+    parts = [bytes(part) for part in MJPEGStreamParser(stream)]
+    assert parts == [b"first", b"second"]
@@ -4,12 +4,18 @@ if not sys.version_info >= (3, 9):
     raise Exception("Python version must be 3.9 or greater to use Wormhole!")
 
 from wormhole.version import __version__
+from wormhole.client import WormholeClient
 
-# Setup Gevent Monkey Patching
-try:
-    from gevent import monkey
-    monkey.patch_all()
-except ModuleNotFoundError:
-    print("Gevent is not installed. Ignoring Monkey Patch.")
+import importlib
 
-from wormhole.core import *
+__all__ = ["__version__", "Wormhole", "WormholeClient"]
+
+# Names that are imported from the server on first use
+CORE_ATTRIBUTES = {"Wormhole", "AbstractController", "FlaskController", "AbstractStreamer", "AbstractViewer", "AbstractVideo"}
+
+
+# The server (and flask) is only imported once it is used, so clients that just view streams start faster
+def __getattr__(name: str):
+    if name not in CORE_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module("wormhole.core"), name)
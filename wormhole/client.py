@@ -0,0 +1,338 @@
+from wormhole.version import __version__
+
+import importlib
+import logging
+import math
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Union
+
+# Viewer for each protocol, as "module:class" so that only the viewer that is used gets imported
+# ORDER MATTERS HERE! Ranked in order from most preferred to least preferred!
+DEFAULT_VIEWER_PROTOCOLS: dict[str, str] = {
+    "RAWJPEG": "wormhole.viewer.rawviewer:RawJPEGViewer",
+    "MJPEG": "wormhole.viewer.mjpegviewer:MJPEGViewer",
+}
+
+
+class WormholeClient():
+    """
+    Lightweight Wormhole Class for Just Reading Streams.
+    Does not start a server, and only imports the viewer of the protocol that is used.
+    """
+
+    def __init__(
+        self,
+        supported_protocols: Optional[dict[str, Union[str, Any]]] = None,
+        session: Optional[Any] = None,
+        max_connections: int = 16
+    ):
+        # Viewer class (or "module:class" path) for each protocol, ranked in order from most preferred to least preferred
+        self.supported_protocols = supported_protocols or DEFAULT_VIEWER_PROTOCOLS
+        if len(self.supported_protocols) == 0:
+            raise Exception("No supported protocols were passed!")
+
+        # Reuse one pooled HTTP session for all sync calls, so connections are kept alive between requests
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+        # Protocol picked by probing for each (hostname, stream name), so later views do not have to probe again
+        self.protocol_cache: dict[tuple[str, str], str] = {}
+
+    # Get the viewer class of a protocol, importing it if needed
+    def get_viewer(self, proto: str):
+        viewer = self.supported_protocols[proto]
+        if isinstance(viewer, str):
+            module_name, _, class_name = viewer.partition(":")
+            viewer = getattr(importlib.import_module(module_name), class_name)
+        return viewer
+
+    # Clean up the hostname so it can be used as a base url
+    @staticmethod
+    def format_hostname(hostname: str):
+        # Verify hostname is valid
+        if not hostname.startswith("http://") and not hostname.startswith("https://"):
+            hostname = f"http://{hostname}"
+        if hostname.endswith("/"):
+            hostname = hostname[:-1]
+        # TODO: use regex to validate hostname, but idk regex
+        return hostname
+
+    def view(self, hostname: str, name: str = "default", **kwargs):
+        return self.view_many(hostname, [name], **kwargs)[name.lower()]
+
+    # View multiple streams from the same server, using a single handshake
+    # Viewers are opened concurrently, and returned as a dictionary of stream name -> viewer
+    def view_many(self, hostname: str, names: Optional[list[str]] = None, probe_protocols: bool = False, probe_duration: float = 1.0, **kwargs):
+        # Process Names
+        if names is not None:
+            names = [name.lower() for name in names]
+            if not all(name.isalnum() for name in names):
+                raise Exception("Name Must Be Alphanumeric!")
+        logging.debug(f"Wormhole Sync: Viewing Managed Streams With Names: {names}")
+
+        hostname = self.format_hostname(hostname)
+        logging.debug(f"Wormhole Sync: Connecting To Host: {hostname}")
+
+        # Get the information of every stream in one request
+        streams = self.handshake(hostname, names)
+
+        # Server does not have any streams
+        if not streams:
+            return {}
+
+        # Open each viewer in its own thread, so slow connections do not block each other
+        with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+            futures = {name: executor.submit(self.open_viewer, hostname, name, stream, probe_protocols=probe_protocols, probe_duration=probe_duration, **kwargs) for name, stream in streams.items()}
+
+        # If any viewer failed to open, close the viewers that did open before raising the error
+        viewers = {name: future.result() for name, future in futures.items() if future.exception() is None}
+        for name, future in futures.items():
+            if future.exception() is not None:
+                for viewer_obj in viewers.values():
+                    viewer_obj.close()
+                raise future.exception()
+        return viewers
+
+    # Open a viewer for a stream, trying each protocol that both the stream and the client support
+    # If probe_protocols is set, every protocol is measured for probe_duration seconds and the fastest one is used
+    def open_viewer(self, hostname: str, name: str, stream: dict[str, Any], probe_protocols: bool = False, probe_duration: float = 1.0, **kwargs):
+        stream_protocols = stream["supported_protocols"]
+        logging.debug(f"Wormhole Sync: Stream {name} supports protocols: {stream_protocols} and has args: {stream}!")
+
+        # Do an intersection between stream_protocols and self.supported_protocols
+        # to get the list of protocols we can use
+        common_protocols = [proto for proto in stream_protocols if proto in self.supported_protocols]
+        logging.debug(f"Wormhole Sync: Common protocols are: {common_protocols} that we can use!")
+        if len(common_protocols) == 0:
+            raise Exception(f"None of the protocols supported by the server are supported by this client! Server: {stream_protocols}, Client: {list(self.supported_protocols.keys())}")
+
+        if probe_protocols:
+            # Use the protocol picked by an earlier probe first, so the stream starts instantly
+            cached_proto = self.protocol_cache.get((hostname, name))
+            if cached_proto in common_protocols:
+                logging.debug(f"Wormhole Sync: Using cached protocol {cached_proto} for stream {name}!")
+                common_protocols.remove(cached_proto)
+                common_protocols.insert(0, cached_proto)
+            elif len(common_protocols) > 1:
+                return self.probe_viewer(hostname, name, stream, common_protocols, probe_duration, **kwargs)
+
+        # Try each supported protocol
+        for proto in common_protocols:
+            try:
+                viewer_obj = self.create_viewer(hostname, name, stream, proto, **kwargs)
+                logging.debug(f"Success! Using {proto} for streaming")
+                return viewer_obj
+            except Exception as e:
+                logging.error(f"Failed to initialize stream with protocol {proto}! Error: {e}")
+                traceback.print_exc()
+                logging.error(f"Attempting Fallback!")
+        else:
+            raise Exception(f"No Supported Protocols Was Successful for Stream {name}!")
+
+    def create_viewer(self, hostname: str, name: str, stream: dict[str, Any], proto: str, **kwargs):
+        logging.debug(f"Attempting to view stream with protocol {proto}")
+
+        # Get the viewer class
+        viewer = self.get_viewer(proto)
+
+        # Initialize the viewer
+        logging.debug(f"Wormhole Sync: Attempting to Initializing Viewer with {proto}!")
+        return viewer(f"{hostname}/wormhole/stream/{name}/{proto.lower()}", stream["width"], stream["height"], max_fps=stream["max_fps"], pixel_size=stream["pixel_size"], **kwargs)
+
+    # Open the stream with every protocol one after another, and use the protocol with the best frame rate
+    # Protocols with a similar frame rate (within 10%) are ranked by the time to the first frame instead
+    # Each protocol is closed before the next one is measured, so protocols do not compete for bandwidth
+    def probe_viewer(self, hostname: str, name: str, stream: dict[str, Any], protocols: list[str], probe_duration: float, **kwargs):
+        best = None  # (fps, latency, proto)
+        last_viewer = None  # (proto, viewer) of the last measured protocol, which is still open
+        for proto in protocols:
+            # Close the previously measured viewer
+            if last_viewer is not None:
+                last_viewer[1].close()
+                last_viewer = None
+
+            try:
+                start_time = time.time()
+                viewer_obj = self.create_viewer(hostname, name, stream, proto, **kwargs)
+            except Exception as e:
+                logging.error(f"Failed to initialize stream with protocol {proto} while probing! Error: {e}")
+                traceback.print_exc()
+                continue
+            last_viewer = (proto, viewer_obj)
+
+            fps, latency = self.measure_viewer(viewer_obj, start_time, probe_duration)
+            logging.info(f"Wormhole Probe: Stream {name} over {proto}: {fps:.1f} fps, {latency * 1000:.1f} ms to first frame")
+
+            if best is None or fps > best[0] * 1.1 or (fps >= best[0] * 0.9 and latency < best[1]):
+                best = (fps, latency, proto)
+
+        if best is None:
+            raise Exception(f"No Supported Protocols Was Successful for Stream {name}!")
+
+        logging.info(f"Wormhole Probe: Using {best[2]} for stream {name}")
+        self.protocol_cache[(hostname, name)] = best[2]
+
+        # Keep the last viewer if it won, otherwise reopen the stream with the best protocol
+        if last_viewer is not None:
+            if last_viewer[0] == best[2]:
+                return last_viewer[1]
+            last_viewer[1].close()
+        return self.create_viewer(hostname, name, stream, best[2], **kwargs)
+
+    # Measure the frame rate of a viewer over probe_duration, and the time from start_time until its first frame
+    # Only successfully decoded frames are counted, so error frames do not count towards the frame rate
+    @staticmethod
+    def measure_viewer(viewer_obj, start_time: float, probe_duration: float):
+        # Wait for the first frame
+        start_count = viewer_obj.frames_decoded
+        while viewer_obj.frames_decoded == start_count:
+            if time.time() - start_time > probe_duration:
+                return 0.0, math.inf
+            time.sleep(0.001)
+        first_frame_time = time.time()
+
+        # Count the frames decoded during the probe
+        first_count = viewer_obj.frames_decoded
+        time.sleep(probe_duration)
+        fps = (viewer_obj.frames_decoded - first_count) / (time.time() - first_frame_time)
+        return fps, first_frame_time - start_time
+
+    # Sync with the server and get the information of the requested streams in one request
+    # Returns a dictionary of stream name -> stream information. Requests every stream if names is None
+    def handshake(self, hostname: str, names: Optional[list[str]] = None):
+        logging.debug(f"Wormhole Sync: Handshaking With Wormhole Server {hostname}!")
+
+        # Sync information with wormhole server
+        resp = self.session.post(
+            url=f"{hostname}/wormhole/handshake",
+            json={
+                "version": __version__,
+                "supported_protocols": list(self.supported_protocols.keys()),
+                "streams": names
+            }
+        )
+
+        # Older servers do not have the handshake, so sync with the server and each stream separately
+        if resp.status_code == 404:
+            logging.debug("Wormhole Sync: Server Does Not Support Handshake! Syncing Each Stream Separately")
+            server_streams = self.sync_wormhole(hostname)
+            for name in names or []:
+                if name not in server_streams:
+                    raise Exception(f"Requested Stream {name} not being streamed by the server! The current streams are: {server_streams}")
+            return {name: self.get_stream_info(hostname, name) for name in names or server_streams}
+
+        resp_json = self.check_server_response(resp)
+        if "streams" not in resp_json or "missing_streams" not in resp_json:
+            raise Exception("Failed To Sync With Wormhole Server! Missing Json Fields!")
+
+        # Check if every requested stream exists
+        if resp_json["missing_streams"]:
+            raise Exception(f"Requested Streams {resp_json['missing_streams']} not being streamed by the server! The current streams are: {resp_json['managed_streams']}")
+
+        logging.debug(f"Wormhole Sync: Handshake Finished!")
+        return {name: self.parse_stream_info(stream_json) for name, stream_json in resp_json["streams"].items()}
+
+    # Check the response of a server sync, and return its json
+    def check_server_response(self, resp):
+        if resp.status_code != 200 and resp.status_code != 400:
+            raise Exception(f"Failed To Sync With Wormhole Server! Error: [{resp.status_code}] {resp.text}")
+
+        # Get the response
+        resp_json = resp.json()
+        if not resp_json:
+            raise Exception("Failed To Sync With Wormhole Server! Invalid Json Response!")
+        logging.debug(f"Wormhole Sync: Server Responded With: {resp_json}!")
+
+        # Verify that all json fields are present
+        # Yes, match exists, BUT this program is supposed to support python3.6 onwards
+        if not all(key in resp_json for key in ["ready", "message", "version", "supported_protocols", "managed_streams"]):
+            raise Exception("Failed To Sync With Wormhole Server! Missing Json Fields!")
+
+        # Check if errored!
+        if resp.status_code == 400:
+            raise Exception(f"Failed To Sync With Wormhole Server! {resp_json.get('message', False)}")
+
+        # NOTE: These should be checked by the server already, but just to double check, run again!
+        # Check if server is ready
+        if not resp_json.get("ready", False):
+            raise Exception(f"Failed To Sync With Wormhole Server! Unknown Error: {resp_json}")
+
+        # Check if version matches
+        if resp_json.get("version", "N/A") != __version__:
+            raise Exception(f"Failed To Sync With Wormhole Server! Version Mismatch! Server: {__version__} Client: {resp_json.get('version', 'N/A')}")
+
+        # Check if server supports all protocols
+        if not any([p in resp_json.get("supported_protocols", []) for p in self.supported_protocols.keys()]):
+            raise Exception(f"Failed To Sync With Wormhole Server! Server Does Not Have Any Supported Protocols!")
+
+        return resp_json
+
+    # Verify the stream information sent by the server, and flatten it into a dictionary
+    @staticmethod
+    def parse_stream_info(stream_json: dict[str, Any]):
+        # Verify that all json fields are present
+        if not all(key in stream_json for key in ["stream_name", "supported_protocols", "stream_info"]):
+            raise Exception("Failed To Sync With Wormhole Stream! Missing Json Fields!")
+
+        # Verify Stream Response
+        stream_info = stream_json.get("stream_info")
+        if not all(key in stream_info for key in ["width", "height", "pixel_size", "max_fps"]):
+            raise Exception("Failed To Sync With Wormhole Stream! Stream Info is Missing Json Fields!")
+
+        return {
+            "supported_protocols": stream_json.get("supported_protocols"),
+            "width": stream_info.get("width", 0),
+            "height": stream_info.get("height", 0),
+            "pixel_size": stream_info.get("pixel_size", 0),
+            "max_fps": stream_info.get("max_fps", 0)
+        }
+
+    def sync_wormhole(self, hostname: str):
+        logging.debug(f"Wormhole Sync: Syncing With Wormhole Server {hostname}!")
+
+        # Sync information with wormhole server
+        resp = self.session.post(
+            url=f"{hostname}/wormhole/sync",
+            json={
+                "version": __version__,
+                "supported_protocols": list(self.supported_protocols.keys())
+            }
+        )
+        resp_json = self.check_server_response(resp)
+
+        # Return with server information
+        logging.debug(f"Wormhole Sync: Server Sync Finished!")
+        return resp_json.get("managed_streams", [])
+
+    # Get the information of a single stream as a dictionary
+    def get_stream_info(self, hostname: str, name: str):
+        logging.debug(f"Wormhole Sync: Syncing With Stream {name} On Wormhole Server {hostname}!")
+
+        # Sync information with wormhole server
+        resp = self.session.get(
+            url=f"{hostname}/wormhole/stream/{name}/sync"
+        )
+
+        if resp.status_code != 200:
+            raise Exception(f"Failed To Sync With Wormhole Stream! Error: [{resp.status_code}] {resp.text}")
+
+        # Get the response
+        resp_json = resp.json()
+        if not resp_json:
+            raise Exception("Failed To Sync With Wormhole Stream! Invalid Json Response!")
+        logging.debug(f"Wormhole Sync: Server Responded With: {resp_json}!")
+
+        logging.debug(f"Wormhole Sync: Stream Sync Finished!")
+        return self.parse_stream_info(resp_json)
+
+    def sync_stream(self, hostname: str, name: str):
+        stream = self.get_stream_info(hostname, name)
+        return stream["supported_protocols"], stream["width"], stream["height"], stream["pixel_size"], stream["max_fps"]
@@ -1,5 +1,12 @@
+# Setup Gevent Monkey Patching
+# Only the server needs it, so it is done when the server is imported instead of when wormhole is imported
+try:
+    from gevent import monkey
+    monkey.patch_all()
+except ModuleNotFoundError:
+    print("Gevent is not installed. Ignoring Monkey Patch.")
+
 import logging
-import requests
 import threading
 import traceback
 from flask import request
@@ -8,6 +15,7 @@ from threading import Thread
 from typing import Optional, Type
 
 from wormhole.version import __version__
+from wormhole.client import WormholeClient
 from wormhole.controller import AbstractController, FlaskController
 from wormhole.streamer import AbstractStreamer
 from wormhole.viewer import AbstractViewer
@@ -59,6 +67,8 @@ class Wormhole():
         # List of automatically managed streams with the video name as the key
         # The value is a tuple with the stream object and the list of supported protocols
         self.managed_streams: dict[str, tuple[AbstractVideo, list[str]]] = {}
+        # Client used to view other wormhole servers. Created on the first view
+        self.client: Optional[WormholeClient] = None
 
         # Set up advanced Wormhole features
         self.advanced_features = advanced_features
@@ -103,52 +113,64 @@ class Wormhole():
     def set_up_advanced_features(self):
         logging.debug("Setting up advanced Wormhole features")
 
-        # Set up basic client sync
-        def client_sync():
-            # Default Response
-            server_response = {
+        # Basic server information, sent with every sync response
+        def get_server_info():
+            return {
                 "version": __version__,
                 "supported_protocols": list(self.supported_protocols.keys()),
                 "managed_streams": list(self.managed_streams.keys()),
             }
 
+        # Check the client information posted to the server. Returns an error message, or None if the client can connect
+        def check_client_info(client_info):
             # Get client information
-            if not request.json:
-                return {
-                    "ready": False,
-                    "message": "Invalid Client Information Sent!",
-                    **server_response
-                }, 400
-            if not all(key in request.json for key in ["version", "supported_protocols"]):
-                return {
-                    "ready": False,
-                    "message": "Posted Json Is Missing Fields!",
-                    **server_response
-                }, 400
+            if not client_info:
+                return "Invalid Client Information Sent!"
+            if not all(key in client_info for key in ["version", "supported_protocols"]):
+                return "Posted Json Is Missing Fields!"
 
             # Check if versions match
-            client_version = request.json.get("version", "N/A")
+            client_version = client_info.get("version", "N/A")
             if client_version != __version__:
-                return {
-                    "ready": False,
-                    "message": f"Wormhole Version Mismatch! Server: {__version__} Client: {client_version}",
-                    **server_response
-                }, 400
+                return f"Wormhole Version Mismatch! Server: {__version__} Client: {client_version}"
 
             # Get client supported protocols & verify if they are supported
-            client_supported_protocols = request.json.get("supported_protocols", [])
+            client_supported_protocols = client_info.get("supported_protocols", [])
             if not any([p in client_supported_protocols for p in self.supported_protocols.keys()]):
+                return f"Client Does Not Support Any of The Supported Protocols! Server Supports: {list(self.supported_protocols.keys())} Client Supports: {client_supported_protocols}"
+
+            return None
+
+        # Get the information a client needs to view a stream
+        def get_stream_info(name):
+            video_obj, supported_protocols = self.managed_streams[name]
+            return {
+                "stream_name": name,
+                "supported_protocols": supported_protocols,
+                "stream_info": {
+                    "width": video_obj.width,
+                    "height": video_obj.height,
+                    "pixel_size": video_obj.pixel_size,
+                    "max_fps": video_obj.max_fps
+                }
+            }
+
+        # Set up basic client sync
+        def client_sync():
+            # Check client information
+            error = check_client_info(request.json)
+            if error:
                 return {
                     "ready": False,
-                    "message": f"Client Does Not Support Any of The Supported Protocols! Server Supports: {list(self.supported_protocols.keys())} Client Supports: {client_supported_protocols}",
-                    **server_response
+                    "message": error,
+                    **get_server_info()
                 }, 400
 
             # Return with server information
             return {
                 "ready": True,
                 "message": f"Wormhole Is Ready To Connect!",
-                **server_response
+                **get_server_info()
             }, 200
 
         self.controller.add_route("/wormhole/sync", client_sync, methods=["POST"], strict_slashes=False, strict_url=False)
@@ -158,25 +180,38 @@ class Wormhole():
             if name not in self.managed_streams:
                 return "Stream Not Found!", 404
 
-            # Get Stream Information
-            video_obj, supported_protocols = self.managed_streams[name]
-
-            # Return with server information
-            server_response = {
+            # Return with stream information
+            return {
                 "version": __version__,
-                "stream_name": name,
-                "supported_protocols": supported_protocols,
-                "stream_info": {
-                    "width": video_obj.width,
-                    "height": video_obj.height,
-                    "pixel_size": video_obj.pixel_size,
-                    "max_fps": video_obj.max_fps
-                }
-            }
-
-            return server_response, 200
+                **get_stream_info(name)
+            }, 200
         self.controller.add_route("/wormhole/stream/<name>/sync", stream_sync, methods=["GET", "POST"], strict_slashes=False, strict_url=False)
 
+        # Set Up Combined Handshake
+        # Does the client sync and the stream sync of every requested stream in one request
+        def handshake():
+            # Check client information
+            error = check_client_info(request.json)
+            if error:
+                return {
+                    "ready": False,
+                    "message": error,
+                    **get_server_info()
+                }, 400
+
+            # Get the requested streams. Defaults to every managed stream
+            stream_names = [name.lower() for name in request.json.get("streams") or self.managed_streams.keys()]
+
+            # Return with server and stream information
+            return {
+                "ready": True,
+                "message": f"Wormhole Is Ready To Connect!",
+                **get_server_info(),
+                "streams": {name: get_stream_info(name) for name in stream_names if name in self.managed_streams},
+                "missing_streams": [name for name in stream_names if name not in self.managed_streams]
+            }, 200
+        self.controller.add_route("/wormhole/handshake", handshake, methods=["POST"], strict_slashes=False, strict_url=False)
+
     #
     # --- Managed Wormhole Streaming ---
     #
@@ -203,7 +238,7 @@ class Wormhole():
     ):
         # Separate out kwargs for CameraVideo object or Streamer Object
         # As CameraVideo is constant, we can hardcode these.
-        camera_video_arg_keys = ["width", "height", "cv2_config", "pixel_size", "frame_modifiers", "frame_subscribers"]
+        camera_video_arg_keys = ["width", "height", "cv2_config", "pixel_size", "frame_modifiers", "frame_subscribers", "frame_tiles", "pipeline_stages"]
         camera_video_args = {}
         streamer_args = {}
         for key, value in kwargs.items():
@@ -232,7 +267,7 @@ class Wormhole():
     ):
         # Separate out kwargs for FileVideo object or Streamer Object
         # As FileVideo is constant, we can hardcode these.
-        file_video_arg_keys = ["width", "height", "repeat", "cv2_config", "pixel_size", "frame_modifiers", "frame_subscribers"]
+        file_video_arg_keys = ["width", "height", "repeat", "cv2_config", "prefetch_size", "timestamp_pacing", "cache_mode", "cache_size", "cache_file", "pixel_size", "frame_modifiers", "frame_subscribers", "frame_tiles", "pipeline_stages"]
         file_video_args = {}
         streamer_args = {}
         for key, value in kwargs.items():
@@ -285,139 +320,31 @@ class Wormhole():
     # --- Managed Wormhole Viewing ---
     #
 
-    def view(self, hostname: str, name: str = "default"):
+    def view(self, hostname: str, name: str = "default", **kwargs):
         # Check if advanced features are enabled
         if not self.advanced_features:
             raise Exception("Managed Streams Are Only Enabled If Advanced Features Are Enabled!")
 
-        # Process Name
-        name = name.lower()
-        if not name.isalnum():
-            raise Exception("Name Must Be Alphanumeric!")
-        logging.debug(f"Wormhole Sync: Viewing Managed Stream With Name: {name}")
-
-        # Verify hostname is valid
-        if not hostname.startswith("http://") and not hostname.startswith("https://"):
-            hostname = f"http://{hostname}"
-        if hostname.endswith("/"):
-            hostname = hostname[:-1]
-        logging.debug(f"Wormhole Sync: Connecting To Host: {hostname}")
-        # TODO: use regex to validate hostname, but idk regex
-
-        # Sync with the server for information
-        server_streams = self.sync_wormhole(hostname)
-        if name not in server_streams:
-            raise Exception(f"Requested Stream {name} not being streamed by the server! The current streams are: {server_streams}")
-        logging.debug(f"Wormhole Sync: Stream {name} is available on the server!")
-
-        # Sync Stream Information
-        stream_protocols, stream_width, stream_height, stream_pixel_size, stream_fps = self.sync_stream(hostname, name)
-        logging.debug(f"Wormhole Sync: Stream {name} supports protocols: {stream_protocols} and has args: Width: {stream_width}, Height: {stream_height}, Pixel Size: {stream_pixel_size}, FPS: {stream_fps}!")
-
-        # Do an intersection between stream_protocols and self.supported_protocols
-        # to get the list of protocols we can use
-        common_protocols = [proto for proto in stream_protocols if proto in self.supported_protocols]
-        logging.debug(f"Wormhole Sync: Common protocols are: {common_protocols} that we can use!")
-        if len(common_protocols) == 0:
-            raise Exception(f"None of the protocols supported by the server are supported by this client! Server: {stream_protocols}, Client: {self.supported_protocols}")
-
-        # Try each supported protocol
-        for proto in common_protocols:
-            logging.debug(f"Attempting to view stream with protocol {proto}")
-
-            try:
-                # Get the viewer class
-                _, viewer = self.supported_protocols[proto]
-
-                # Initialize the viewer
-                logging.debug(f"Wormhole Sync: Attempting to Initializing Viewer with {proto}!")
-                viewer_obj = viewer(f"{hostname}/wormhole/stream/{name}/{proto.lower()}", stream_width, stream_height, max_fps=stream_fps, pixel_size=stream_pixel_size)
-
-                logging.debug(f"Success! Using {proto} for streaming")
-                return viewer_obj
-            except Exception as e:
-                logging.error(f"Failed to initialize stream with protocol {proto}! Error: {e}")
-                traceback.print_exc()
-                logging.error(f"Attempting Fallback!")
-        else:
-            raise Exception(f"No Supported Protocols Was Successful for Stream {name}!")
-
-    def sync_wormhole(self, hostname: str):
-        logging.debug(f"Wormhole Sync: Syncing With Wormhole Server {hostname}!")
-
-        # Sync information with wormhole server
-        resp = requests.post(
-            url=f"{hostname}/wormhole/sync",
-            json={
-                "version": __version__,
-                "supported_protocols": list(self.supported_protocols.keys())
-            }
-        )
-
-        if resp.status_code != 200 and resp.status_code != 400:
-            raise Exception(f"Failed To Sync With Wormhole Server! Error: [{resp.status_code}] {resp.text}")
-
-        # Get the response
-        resp_json = resp.json()
-        if not resp_json:
-            raise Exception("Failed To Sync With Wormhole Server! Invalid Json Response!")
-        logging.debug(f"Wormhole Sync: Server Responded With: {resp_json}!")
-
-        # Verify that all json fields are present
-        # Yes, match exists, BUT this program is supposed to support python3.6 onwards
-        if not all(key in resp_json for key in ["ready", "message", "version", "supported_protocols", "managed_streams"]):
-            raise Exception("Failed To Sync With Wormhole Server! Missing Json Fields!")
-
-        # Check if errored!
-        if resp.status_code == 400:
-            raise Exception(f"Failed To Sync With Wormhole Server! {resp_json.get('message', False)}")
+        return self.get_client().view(hostname, name, **kwargs)
 
-        # NOTE: These should be checked by the server already, but just to double check, run again!
-        # Check if server is ready
-        if not resp_json.get("ready", False):
-            raise Exception(f"Failed To Sync With Wormhole Server! Unknown Error: {resp_json}")
-
-        # Check if version matches
-        if resp_json.get("version", "N/A") != __version__:
-            raise Exception(f"Failed To Sync With Wormhole Server! Version Mismatch! Server: {__version__} Client: {resp_json.get('version', 'N/A')}")
+    def view_many(self, hostname: str, names: Optional[list[str]] = None, **kwargs):
+        # Check if advanced features are enabled
+        if not self.advanced_features:
+            raise Exception("Managed Streams Are Only Enabled If Advanced Features Are Enabled!")
 
-        # Check if server supports all protocols
-        if not any([p in resp_json.get("supported_protocols", []) for p in self.supported_protocols.keys()]):
-            raise Exception(f"Failed To Sync With Wormhole Server! Server Does Not Have Any Supported Protocols!")
+        return self.get_client().view_many(hostname, names, **kwargs)
 
-        # Return with server information
-        logging.debug(f"Wormhole Sync: Server Sync Finished!")
-        return resp_json.get("managed_streams", [])
+    def sync_wormhole(self, hostname: str):
+        return self.get_client().sync_wormhole(hostname)
 
     def sync_stream(self, hostname: str, name: str):
-        logging.debug(f"Wormhole Sync: Syncing With Stream {name} On Wormhole Server {hostname}!")
+        return self.get_client().sync_stream(hostname, name)
 
-        # Sync information with wormhole server
-        resp = requests.get(
-            url=f"{hostname}/wormhole/stream/{name}/sync"
-        )
-
-        if resp.status_code != 200:
-            raise Exception(f"Failed To Sync With Wormhole Stream! Error: [{resp.status_code}] {resp.text}")
-
-        # Get the response
-        resp_json = resp.json()
-        if not resp_json:
-            raise Exception("Failed To Sync With Wormhole Stream! Invalid Json Response!")
-        logging.debug(f"Wormhole Sync: Server Responded With: {resp_json}!")
-
-        # Verify that all json fields are present
-        # Yes, match exists, BUT this program is supposed to support python3.6 onwards
-        if not all(key in resp_json for key in ["version", "stream_name", "supported_protocols", "stream_info"]):
-            raise Exception("Failed To Sync With Wormhole Stream! Missing Json Fields!")
-
-        # Verify Stream Response
-        stream_info = resp_json.get("stream_info")
-        if not all(key in stream_info for key in ["width", "height", "pixel_size", "max_fps"]):
-            raise Exception("Failed To Sync With Wormhole Stream! Stream Info is Missing Json Fields!")
-
-        logging.debug(f"Wormhole Sync: Stream Sync Finished!")
-        return resp_json.get("supported_protocols"), stream_info.get("width", 0), stream_info.get("height", 0), stream_info.get("pixel_size", 0), stream_info.get("max_fps", 0)
+    # Get the client used to view streams, using the viewers of this wormhole's supported protocols
+    def get_client(self):
+        if self.client is None:
+            self.client = WormholeClient({proto: viewer for proto, (_, viewer) in self.supported_protocols.items()})
+        return self.client
 
     #
     # --- Helper Streaming Functions ---
@@ -461,10 +388,3 @@ class Wormhole():
         for thread_id, thread in enumerate(threading.enumerate()):
             output += f"<p>{thread_id} | {escape(thread)}</p>"
         return output
-
-
-class WormholeClient():
-    """
-    TODO: Lightweight Wormhole Class for Just Reading Streams
-    """
-    pass
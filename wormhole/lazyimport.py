@@ -0,0 +1,22 @@
+import importlib
+import sys
+
+
+# Create the module level __getattr__ and __dir__ functions for a package that only imports its submodules once they are used
+# lazy_names -> Maps each name to the submodule it is defined in
+def create_lazy_importer(package_name: str, lazy_names: dict[str, str]):
+    package = sys.modules[package_name]
+
+    def __getattr__(name: str):
+        if name not in lazy_names:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+
+        # Import the submodule, and save the name on the package so it is only looked up once
+        value = getattr(importlib.import_module(f"{package_name}.{lazy_names[name]}"), name)
+        setattr(package, name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(package)) | set(lazy_names))
+
+    return __getattr__, __dir__
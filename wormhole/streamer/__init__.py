@@ -1,4 +1,21 @@
-from wormhole.streamer.abstractstreamer import *
-from wormhole.streamer.socketiostreamer import *
-from wormhole.streamer.mjpegstreamer import *
-from wormhole.streamer.rawstreamer import *
+from wormhole.lazyimport import create_lazy_importer
+
+# Submodule each name is defined in. Submodules are only imported once one of their names is used
+lazy_names = {
+    # Abstract Streamer
+    "AbstractStreamer": "abstractstreamer",
+    "FrameChangeDetector": "abstractstreamer",
+    "EncodedFrameHistory": "abstractstreamer",
+    "parse_history_offset": "abstractstreamer",
+    # SocketIO Streamers
+    "SocketIOStreamerBase": "socketiostreamer",
+    "RawStreamer": "rawstreamer",
+    "RawIMEncodeStreamerBase": "rawstreamer",
+    "RawJPEGStreamer": "rawstreamer",
+    "RawPNGStreamer": "rawstreamer",
+    "RawImageFormatStreamer": "rawstreamer",
+    # HTTP Streamers
+    "MJPEGStreamer": "mjpegstreamer",
+}
+__all__ = list(lazy_names)
+__getattr__, __dir__ = create_lazy_importer(__name__, lazy_names)
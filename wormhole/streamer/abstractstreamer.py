@@ -1,7 +1,15 @@
-from wormhole.controller import AbstractController
 from wormhole.video import AbstractVideo
 
-from typing import Optional
+import cv2
+import re
+import time
+from collections import deque
+from threading import Condition
+from typing import Optional, TYPE_CHECKING
+
+# The controller is only needed for type checking, so flask is not imported with the streamers
+if TYPE_CHECKING:
+    from wormhole.controller import AbstractController
 
 
 class AbstractStreamer():
@@ -11,12 +19,18 @@ class AbstractStreamer():
 
     def __init__(
         self,
-        controller: AbstractController,
+        controller: "AbstractController",
         video: AbstractVideo,
         route: str,
         fps_override: Optional[float] = None,
         print_fps: bool = False,
-        strict_url: bool = True
+        strict_url: bool = True,
+        skip_unchanged: bool = False,
+        change_threshold: float = 0.5,
+        keepalive_interval: float = 1.0,
+        history_seconds: float = 0.0,
+        history_size: int = 16 * 1024 * 1024,
+        replay_speed: float = 4.0
     ):
         self.controller = controller
         self.video = video
@@ -24,3 +38,201 @@ class AbstractStreamer():
         self.max_fps = fps_override or self.video.max_fps
         self.print_fps = print_fps
         self.strict_url = strict_url
+        # Static Scene Suppression -> Skip encoding and sending frames that did not change
+        self.skip_unchanged = skip_unchanged
+        self.change_threshold = change_threshold
+        self.keepalive_interval = keepalive_interval
+        # Encoded Frame History -> Lets new clients get the newest frame instantly, and replay recent frames
+        # Replay is opt-in. By default only the newest frame is kept, set history_seconds to let clients replay with ?from=-10s
+        # history_size caps the memory used by the history of each stream
+        self.frame_history = EncodedFrameHistory(history_seconds=history_seconds, history_size=history_size)
+        self.replay_speed = replay_speed
+
+    # Create a change detector for a single output of this stream
+    def create_change_detector(self):
+        return FrameChangeDetector(
+            self.video,
+            enabled=self.skip_unchanged,
+            change_threshold=self.change_threshold,
+            keepalive_interval=self.keepalive_interval
+        )
+
+
+class FrameChangeDetector():
+    """
+    Checks if a video has changed enough since the last frame that was sent.
+    Frames are compared using a small grayscale signature, which is shared with every other reader of the video.
+    """
+
+    def __init__(
+        self,
+        video: AbstractVideo,
+        enabled: bool = True,
+        change_threshold: float = 0.5,
+        keepalive_interval: float = 1.0,
+        signature_width: int = 32
+    ):
+        self.video = video
+        self.enabled = enabled
+        # Mean absolute difference (0-255) of the signature needed to count as a new frame
+        self.change_threshold = change_threshold
+        # Maximum time between sent frames, so clients know the stream is alive
+        self.keepalive_interval = keepalive_interval
+        self.signature_size = (signature_width, max(round(signature_width * video.height / video.width), 1))
+
+        # Last Checked and Last Sent Frame
+        self.last_version: Optional[int] = None
+        self.sent_version: Optional[int] = None
+        self.last_signature = None
+        self.last_sent: float = 0.0
+
+        # Detector Statistics
+        self.frames_changed: int = 0
+        self.frames_skipped: int = 0
+        self.keepalives: int = 0
+
+    # Check if the current frame of the video is different from the last frame that was sent
+    def frame_changed(self):
+        if not self.enabled:
+            return True
+
+        # Frame was not updated at all
+        version = self.video.frame_version
+        if version == self.last_version:
+            return False
+        self.last_version = version
+
+        # Frame was updated, but it may still look the same
+        signature = self.video.get_derived(size=self.signature_size, color="gray")
+        if self.last_signature is not None and signature.shape == self.last_signature.shape:
+            difference = cv2.norm(signature, self.last_signature, cv2.NORM_L1) / signature.size
+            if difference <= self.change_threshold:
+                return False
+        self.last_signature = signature
+        return True
+
+    # Forget the last sent frame, so the next frame is always sent
+    def reset(self):
+        self.last_version = None
+        self.sent_version = None
+        self.last_signature = None
+
+    # Check what should be sent for the current frame
+    # Returns "frame" if a new frame should be encoded, "keepalive" if the last frame should be resent, or None to skip
+    def check(self):
+        if self.frame_changed():
+            self.frames_changed += 1
+            self.sent_version = self.last_version
+            self.last_sent = time.time()
+            return "frame"
+        if time.time() - self.last_sent >= self.keepalive_interval:
+            self.keepalives += 1
+            self.last_sent = time.time()
+            # Small changes below the threshold can add up over time, so send the current frame instead of the old one
+            if self.last_version != self.sent_version:
+                self.sent_version = self.last_version
+                self.last_signature = self.video.get_derived(size=self.signature_size, color="gray")
+                return "frame"
+            return "keepalive"
+        self.frames_skipped += 1
+        return None
+
+    def get_stats(self):
+        return {
+            "frames_changed": self.frames_changed,
+            "frames_skipped": self.frames_skipped,
+            "keepalives": self.keepalives,
+        }
+
+
+class EncodedFrameHistory():
+    """
+    Ring buffer of the most recent encoded frames of a stream, along with the time each frame was encoded.
+    The newest frame is always kept, even if it is older than the history length.
+    """
+
+    def __init__(
+        self,
+        history_seconds: float = 0.0,
+        history_size: int = 16 * 1024 * 1024
+    ):
+        # Maximum age (in seconds) and total size (in bytes) of the frames kept
+        self.history_seconds = history_seconds
+        self.history_size = history_size
+
+        # Holds (index, timestamp, data) tuples, from oldest to newest
+        self.frames: deque = deque()
+        self.frames_size: int = 0
+        # Index of the next frame. Used by readers to know which frames they already got
+        self.next_index: int = 0
+        self.condition = Condition()
+
+    # Add a newly encoded frame, and remove frames that are too old
+    def add_frame(self, data: bytes):
+        with self.condition:
+            timestamp = time.time()
+            self.frames.append((self.next_index, timestamp, data))
+            self.frames_size += len(data)
+            self.next_index += 1
+
+            # Trim the history, always keeping the newest frame
+            while len(self.frames) > 1 and (
+                timestamp - self.frames[0][1] > self.history_seconds or self.frames_size > self.history_size
+            ):
+                self.frames_size -= len(self.frames.popleft()[2])
+
+            # Wake up all readers waiting for a new frame
+            self.condition.notify_all()
+
+    # Get the newest frame as an (index, timestamp, data) tuple. Returns None if no frames were added yet
+    def get_latest(self):
+        with self.condition:
+            return self.frames[-1] if self.frames else None
+
+    # Get all frames encoded after the given timestamp
+    def get_frames_since(self, timestamp: float):
+        with self.condition:
+            return [frame for frame in self.frames if frame[1] >= timestamp]
+
+    # Wait until there is a frame newer than the given index, and return the newest frame
+    # Returns None if no new frame was added before the timeout
+    def wait_for_frame(self, after_index: int, timeout: Optional[float] = None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.frames and self.frames[-1][0] > after_index, timeout=timeout):
+                return None
+            return self.frames[-1]
+
+    # Replay the frames from the last few seconds, paced at replay_speed times their original speed
+    # Yields (index, data) tuples
+    def replay_frames(self, offset: float, replay_speed: float = 4.0, sleep_func=time.sleep):
+        last_timestamp = None
+        for index, timestamp, data in self.get_frames_since(time.time() - offset):
+            if last_timestamp is not None and replay_speed > 0:
+                sleep_func((timestamp - last_timestamp) / replay_speed)
+            last_timestamp = timestamp
+            yield index, data
+
+    # Yield the newest frame as soon as it is added, newer than the given index
+    # If no new frame is added within the keepalive interval, the last frame is sent again
+    def live_frames(self, after_index: int = -1, keepalive_interval: Optional[float] = None):
+        last_data = None
+        while True:
+            frame = self.wait_for_frame(after_index, timeout=keepalive_interval)
+            if frame is not None:
+                after_index, _, last_data = frame
+            elif last_data is None:
+                continue
+            yield after_index, last_data
+
+
+# Parse a history offset such as "-10s", "-500ms", "-2m", or "10" into a number of seconds
+def parse_history_offset(value: Optional[str]):
+    if not value:
+        return None
+
+    match = re.fullmatch(r"-?(\d+(?:\.\d+)?)(ms|s|m)?", value.strip())
+    if match is None:
+        raise ValueError(f"Invalid History Offset {value}! Expected a value such as '-10s', '-500ms', or '-2m'")
+
+    number, unit = match.groups()
+    return float(number) * {"ms": 0.001, "s": 1, "m": 60, None: 1}[unit]
@@ -1,17 +1,20 @@
-from wormhole.streamer import AbstractStreamer
+from wormhole.streamer import AbstractStreamer, parse_history_offset
 from wormhole.utils import FrameController
 
 import cv2
 import logging
 import time
 import traceback
+from flask import request
 from flask.wrappers import Response
+from threading import Lock, Thread
 from typing import Optional, Any
 
 
 class MJPEGStreamer(AbstractStreamer):
     """
     Streamer for the Motion JPEG video protocol
+    Frames are encoded once in a shared encoder thread, and sent from the frame history to every client.
     """
 
     def __init__(
@@ -25,28 +28,33 @@ class MJPEGStreamer(AbstractStreamer):
         self.boundary = boundary
         self.imencode_config = imencode_config
 
+        # Control variables to save on execution when no clients are connected
+        self.connected_clients = 0
+        self.clients_lock = Lock()
+        self.video_encoder_thread: Optional[Thread] = None
+
         # Create Video Feed Handler for Flask
         def video_feed():
-            # Render and Send Frames for each client
+            # Get how far back in the history to start the stream from. (Ex: ?from=-10s)
+            try:
+                history_offset = parse_history_offset(request.args.get("from"))
+            except ValueError as e:
+                return Response(str(e), status=400)
+
+            # Send Frames from the frame history to each client
             def generate_next_frame():
-                frame_controller = FrameController(self.max_fps, print_fps=self.print_fps)
-                while True:
-                    try:
-                        _, jpg = cv2.imencode(
-                            ".jpg",
-                            self.video.get_frame(),
-                            self.imencode_config or []  # Use Empty Config if imencode is not available
-                        )
-                        yield (b"--" + boundary.encode("ascii") + b"\r\nContent-Type: image/jpeg\r\n\r\n" + jpg.tobytes() + b"\r\n")
-                        frame_controller.next_frame()
-                    except Exception as e:
-                        # Print Error To User
-                        logging.error(f"Error While Generating JPEG for Stream! {e}")
-                        traceback.print_exc()
-                        time.sleep(1)
-
-                        # Reset FPS Statistics in case the video works again
-                        frame_controller.reset_fps_stats()
+                self.add_client()
+                try:
+                    last_index = -1
+                    # Replay recent frames first
+                    if history_offset is not None:
+                        for last_index, jpg in self.frame_history.replay_frames(history_offset, self.replay_speed):
+                            yield self.create_part(jpg)
+                    # Then send the newest frame, as soon as it is encoded
+                    for last_index, jpg in self.frame_history.live_frames(last_index, self.keepalive_interval):
+                        yield self.create_part(jpg)
+                finally:
+                    self.remove_client()
 
             return Response(
                 generate_next_frame(),
@@ -55,3 +63,55 @@ class MJPEGStreamer(AbstractStreamer):
 
         # Add the video feed route to the network controller
         self.controller.add_route(self.route, video_feed, strict_url=self.strict_url)
+
+    # Wrap a JPEG frame into a multipart message
+    def create_part(self, jpg: bytes):
+        return (
+            b"--" + self.boundary.encode("ascii") + b"\r\n"
+            b"Content-Type: image/jpeg\r\n"
+            b"Content-Length: " + str(len(jpg)).encode("ascii") + b"\r\n\r\n"
+            + jpg + b"\r\n"
+        )
+
+    # Start the video encoder if it is not already running
+    def add_client(self):
+        with self.clients_lock:
+            self.connected_clients += 1
+            if self.video_encoder_thread is None or not self.video_encoder_thread.is_alive():
+                self.video_encoder_thread = Thread(target=self.video_encoder, daemon=True)
+                self.video_encoder_thread.start()
+
+    def remove_client(self):
+        with self.clients_lock:
+            self.connected_clients -= 1
+
+    # Encode frames into the frame history while any client is connected
+    def video_encoder(self):
+        frame_controller = FrameController(self.max_fps, print_fps=self.print_fps)
+        change_detector = self.create_change_detector()
+        while True:
+            # Kill the thread if no clients are connected
+            with self.clients_lock:
+                if self.connected_clients <= 0:
+                    self.video_encoder_thread = None
+                    return
+
+            try:
+                # Only encode the frame if it changed. Clients resend the last frame as a keepalive by themselves
+                if change_detector.check() == "frame":
+                    _, jpg = cv2.imencode(
+                        ".jpg",
+                        self.video.get_frame(),
+                        self.imencode_config or []  # Use Empty Config if imencode is not available
+                    )
+                    self.frame_history.add_frame(jpg.tobytes())
+                frame_controller.next_frame()
+            except Exception as e:
+                # Print Error To User
+                logging.error(f"Error While Generating JPEG for Stream! {e}")
+                traceback.print_exc()
+                time.sleep(1)
+
+                # Reset FPS Statistics and the change detector in case the video works again
+                frame_controller.reset_fps_stats()
+                change_detector.reset()
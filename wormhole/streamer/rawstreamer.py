@@ -20,9 +20,18 @@ class RawStreamer(SocketIOStreamerBase):
         # Initiate Parent SocketIO Streamer Object
         super().__init__(self.stream_hotloop, *args, **kwargs)
 
+        # Skip sending frames that did not change
+        self.change_detector = self.create_change_detector()
+        self.last_data: Optional[bytes] = None
+
     # Hotloop for sending raw video
     def stream_hotloop(self):
-        self.send_data(self.video.get_frame().tobytes())
+        action = self.change_detector.check()
+        if action == "frame" or self.last_data is None:
+            self.last_data = self.video.get_frame().tobytes()
+            self.frame_history.add_frame(self.last_data)
+        if action is not None:
+            self.send_data(self.last_data)
 
 
 class RawIMEncodeStreamerBase(SocketIOStreamerBase):
@@ -44,14 +53,24 @@ class RawIMEncodeStreamerBase(SocketIOStreamerBase):
         self.file_format = file_format
         self.imencode_config = imencode_config
 
+        # Skip encoding and sending frames that did not change
+        self.change_detector = self.create_change_detector()
+        self.last_data: Optional[bytes] = None
+
     # Hotloop for sending raw video
     def stream_hotloop(self):
-        _, encoded_image = cv2.imencode(
-            self.file_format,
-            self.video.get_frame(),
-            self.imencode_config or []  # Use Empty Config if imencode is not available
-        )
-        self.send_data(encoded_image.tobytes())
+        # Only encode the frame if it changed. Otherwise, skip it or resend the last frame as a keepalive
+        action = self.change_detector.check()
+        if action == "frame" or self.last_data is None:
+            _, encoded_image = cv2.imencode(
+                self.file_format,
+                self.video.get_frame(),
+                self.imencode_config or []  # Use Empty Config if imencode is not available
+            )
+            self.last_data = encoded_image.tobytes()
+            self.frame_history.add_frame(self.last_data)
+        if action is not None:
+            self.send_data(self.last_data)
 
 # Proxy classes for each of the supported streaming formats.
 # They all run the exact same thing, but this is here so it fits with the API structure
@@ -1,9 +1,10 @@
 from wormhole.utils import FrameController
-from wormhole.streamer import AbstractStreamer
+from wormhole.streamer import AbstractStreamer, parse_history_offset
 
 import logging
 import time
 import traceback
+from flask import request
 from flask_socketio import emit, join_room
 from threading import Thread
 from typing import Any, Callable
@@ -40,6 +41,23 @@ class SocketIOStreamerBase(AbstractStreamer):
                 self.video_streamer_thread = Thread(target=self.video_streamer)
                 self.video_streamer_thread.start()
 
+            # Get how far back in the history to start the stream from. (Ex: ?from=-10s)
+            try:
+                history_offset = parse_history_offset(request.args.get("from"))
+            except ValueError as e:
+                logging.warning(f"Ignoring History Offset for SocketIO Stream! {e}")
+                history_offset = None
+
+            # Replay recent frames to the client first, then add it to the video room
+            if history_offset is not None:
+                self.controller.socketio.start_background_task(self.replay_history, request.sid, history_offset)
+                return
+
+            # Send the newest frame right away, so the client does not have to wait for the next one
+            latest_frame = self.frame_history.get_latest()
+            if latest_frame is not None:
+                emit("frame", latest_frame[2])
+
             # Tell client to join the video room
             join_room("video_feed")
         self.controller.add_message_handler("connect", on_connect, namespace=self.route, strict_url=self.strict_url)
@@ -77,6 +95,19 @@ class SocketIOStreamerBase(AbstractStreamer):
 
                 frame_controller.next_frame()
 
+    # Replay recent frames to a single client, then add it to the video room
+    def replay_history(self, sid: str, history_offset: float):
+        socketio = self.controller.socketio
+        last_index = -1
+        for last_index, data in self.frame_history.replay_frames(history_offset, self.replay_speed):
+            socketio.emit("frame", data, to=sid, namespace=self.route)
+
+        # Catch up to the newest frame before switching to live
+        latest_frame = self.frame_history.get_latest()
+        if latest_frame is not None and latest_frame[0] > last_index:
+            socketio.emit("frame", latest_frame[2], to=sid, namespace=self.route)
+        socketio.server.enter_room(sid, "video_feed", namespace=self.route)
+
     # Helper function to emit socket information
     def send_data(self, data: Any):
         emit("frame", data, room="video_feed", namespace=self.route, broadcast=True)
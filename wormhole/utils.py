@@ -1,9 +1,13 @@
 import cv2
 import math
 import numpy as np
+import os
 import time
+import weakref
+from collections import OrderedDict
 from pathlib import Path
-from typing import Union
+from threading import Lock, local
+from typing import Callable, Optional, Union
 
 
 #
@@ -55,6 +59,133 @@ def draw_text(
     )
 
 
+def render_text_sprite(
+    text: str,
+    font_family: int,
+    font_size: float,
+    font_color: tuple,
+    font_stroke: int,
+    outline_color: Optional[tuple] = None,
+    outline_stroke: int = 0
+):
+    """
+    Renders text onto a small premultiplied sprite with an alpha mask.
+    Returns the inverse alpha mask, the premultiplied sprite, and the offset of the text origin within the sprite
+    """
+
+    # Determine the size of the sprite
+    stroke = max(font_stroke, outline_stroke if outline_color is not None else 0)
+    (text_width, text_height), baseline = cv2.getTextSize(text, font_family, font_size, stroke)
+    padding = stroke * 2
+    sprite_shape = (text_height + baseline + padding * 2, text_width + padding * 2)
+    origin = (padding, padding + text_height)
+
+    # Draw the text onto an alpha mask, as text may be anti-aliased
+    fill_alpha = np.zeros(sprite_shape, np.uint8)
+    cv2.putText(fill_alpha, text, origin, font_family, font_size, 255, font_stroke)
+    fill_alpha = fill_alpha.astype(np.float32)[:, :, np.newaxis] / 255
+    alpha = fill_alpha
+    sprite = fill_alpha * np.array(font_color, np.float32)
+
+    # Draw the outline underneath the text
+    if outline_color is not None:
+        outline_alpha = np.zeros(sprite_shape, np.uint8)
+        cv2.putText(outline_alpha, text, origin, font_family, font_size, 255, outline_stroke)
+        outline_alpha = outline_alpha.astype(np.float32)[:, :, np.newaxis] / 255 * (1 - fill_alpha)
+        alpha = alpha + outline_alpha
+        sprite = sprite + outline_alpha * np.array(outline_color, np.float32)
+
+    # Convert to integer weights between 0 and 256, same as the watermark overlay
+    inverse_alpha = np.repeat(256 - np.rint(alpha * 256).astype(np.uint16), 3, axis=2)
+    premultiplied_sprite = np.rint(sprite * 256).astype(np.uint16)
+    return inverse_alpha, premultiplied_sprite, origin
+
+
+def draw_cached_text(
+    frame: np.ndarray,
+    text: str,
+    position: tuple[int, int],
+    font_family: int = cv2.FONT_HERSHEY_SIMPLEX,
+    font_size: float = 1,
+    font_color: tuple = (255, 255, 255),
+    font_stroke: int = 2,
+    outline_color: Optional[tuple] = None,
+    outline_stroke: int = 0
+):
+    """
+    Draws text at given location, using a cache of pre-rendered text sprites.
+    Useful for text that is drawn every frame, as only text that changes needs to be rendered again.
+    """
+
+    # Sprites are only made for 3 channel frames. Draw on other frames directly, the same way as without the cache
+    if frame.ndim != 3 or frame.shape[2] != 3:
+        if outline_color is not None:
+            cv2.putText(frame, text, position, font_family, font_size, outline_color, outline_stroke)
+        return cv2.putText(frame, text, position, font_family, font_size, font_color, font_stroke)
+
+    # Get the text sprite from cache, rendering it if it is not in cache
+    key = (text, font_family, font_size, font_color, font_stroke, outline_color, outline_stroke)
+    with text_sprite_lock:
+        text_sprite = text_sprite_cache.get(key)
+        if text_sprite is not None:
+            text_sprite_cache.move_to_end(key)
+    if text_sprite is None:
+        text_sprite = render_text_sprite(text, font_family, font_size, font_color, font_stroke, outline_color, outline_stroke)
+        with text_sprite_lock:
+            text_sprite_cache[key] = text_sprite
+            # Remove least recently used sprites if cache is full
+            while len(text_sprite_cache) > text_sprite_cache_size:
+                text_sprite_cache.popitem(last=False)
+    inverse_alpha, premultiplied_sprite, (origin_x, origin_y) = text_sprite
+
+    # Get the location of the sprite on the frame, and clip it to the frame
+    pos_x, pos_y = position[0] - origin_x, position[1] - origin_y
+    sprite_height, sprite_width = premultiplied_sprite.shape[:2]
+    frame_height, frame_width = frame.shape[:2]
+    start_x, start_y = max(pos_x, 0), max(pos_y, 0)
+    end_x, end_y = min(pos_x + sprite_width, frame_width), min(pos_y + sprite_height, frame_height)
+    if start_x >= end_x or start_y >= end_y:
+        return frame
+    sprite_region = (slice(start_y - pos_y, end_y - pos_y), slice(start_x - pos_x, end_x - pos_x))
+
+    # Blend the sprite onto the frame, in place
+    roi = frame[start_y:end_y, start_x:end_x]
+    blended = np.multiply(roi, inverse_alpha[sprite_region])
+    np.add(blended, premultiplied_sprite[sprite_region], out=blended)
+    np.right_shift(blended, 8, out=blended)
+    np.copyto(roi, blended, casting="unsafe")
+    return frame
+
+
+# Cache of pre-rendered text sprites. Least recently used sprites are removed once the cache is full
+text_sprite_cache: OrderedDict[tuple, tuple] = OrderedDict()
+text_sprite_cache_size: int = 1024
+text_sprite_lock = Lock()
+
+
+def get_throttled_text(video, name: str, generate_text: Callable[[], list[str]], refresh_interval: float):
+    """
+    Helper function to only regenerate text for a video every refresh_interval seconds.
+    Used so that frequently changing statistics do not need to be rendered every frame
+    """
+
+    # Regenerate text if throttling is disabled
+    if refresh_interval <= 0:
+        return generate_text()
+
+    # Get the last generated text for this video
+    video_text = throttled_text_cache.setdefault(video, {})
+    last_update, text = video_text.get(name, (0.0, None))
+    if text is None or time.time() - last_update >= refresh_interval:
+        text = generate_text()
+        video_text[name] = (time.time(), text)
+    return text
+
+
+# Cache of throttled text for each video
+throttled_text_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
 def draw_multiline_text(
     frame: np.ndarray,
     width: int,
@@ -99,7 +230,7 @@ def draw_multiline_text(
 
     # Place the text on the frame
     for i, line in enumerate(text):
-        frame = draw_text(frame, line, (x_offset + 10, y_offset + (i + 1) * CHAR_HEIGHT), font_size=FONT_SIZE, font_stroke=FONT_STROKE)
+        frame = draw_cached_text(frame, line, (x_offset + 10, y_offset + (i + 1) * CHAR_HEIGHT), font_size=FONT_SIZE, font_stroke=FONT_STROKE)
 
     return frame
 
@@ -176,11 +307,17 @@ def blend_frames(frame1: np.ndarray, frame2: np.ndarray, transparency=0.5):
 #
 
 
-def render_watermark(video):
+def get_watermark_overlay(width: int, height: int, opacity: float):
     """
-    Renders a "Powered By Wormhole" watermark at the bottom of the screen
+    Gets the premultiplied watermark overlay and alpha mask for a given video size and opacity.
+    Overlays are cached, so the watermark is only resized and processed once per video size.
     """
 
+    # Checks if the overlay is already in cache
+    overlay = watermark_overlay_cache.get((width, height, opacity))
+    if overlay is not None:
+        return overlay
+
     # Checks if loaded image is already in cache
     wormhole_watermark = globals().get("wormhole_watermark")
     if wormhole_watermark is None:
@@ -192,7 +329,7 @@ def render_watermark(video):
         globals()["wormhole_watermark"] = wormhole_watermark
 
     # Dynamically determine the watermark padding distance
-    padding = max(video.height // 50, video.width // 50)
+    padding = max(height // 50, width // 50)
 
     # --- Calculate the watermark position ---
 
@@ -200,8 +337,8 @@ def render_watermark(video):
     wm_height, wm_width = wormhole_watermark.shape[:2]
 
     # Get target width and height
-    target_width = video.width // 1.5
-    target_height = video.height // 6
+    target_width = width // 1.5
+    target_height = height // 6
 
     # Get ratios of the two targets, and calculate which one is smaller
     width_ratio = target_width / wm_width
@@ -209,63 +346,102 @@ def render_watermark(video):
     ratio = min(width_ratio, height_ratio)
 
     # Get the proper widths and heights
-    width = int(wm_width * ratio)
-    height = int(wm_height * ratio)
+    overlay_width = int(wm_width * ratio)
+    overlay_height = int(wm_height * ratio)
+
+    # --- Precompute the overlay ---
+
+    # Resize the watermark and extract the alpha mask
+    resized_watermark = cv2.resize(wormhole_watermark, (overlay_width, overlay_height))
+    overlay_color = resized_watermark[:, :, :3]
+
+    # Apply some simple filtering to remove edge noise
+    mask = cv2.medianBlur(np.ascontiguousarray(resized_watermark[:, :, 3]), 5)
+
+    # Convert the alpha mask to an integer weight between 0 and 256, scaled by the opacity
+    # The alpha mask is expanded to all three channels so blending does not need to broadcast
+    alpha = (mask.astype(np.uint32) * round(opacity * 256) // 255).astype(np.uint16)
+    alpha = np.repeat(alpha[:, :, np.newaxis], 3, axis=2)
+    inverse_alpha = 256 - alpha
+    premultiplied_overlay = overlay_color.astype(np.uint16) * alpha
+
+    # Cache the overlay
+    overlay = (padding, height - overlay_height - padding, inverse_alpha, premultiplied_overlay)
+    watermark_overlay_cache[(width, height, opacity)] = overlay
+    return overlay
+
+
+def render_watermark(video, opacity: float = 0.5):
+    """
+    Renders a "Powered By Wormhole" watermark at the bottom of the screen
+    """
+
+    # Get the precomputed overlay for this video size
+    pos_x, pos_y, inverse_alpha, premultiplied_overlay = get_watermark_overlay(video.width, video.height, opacity)
+    overlay_height, overlay_width = premultiplied_overlay.shape[:2]
 
-    # Render the watermark onto a copy of the frame
-    watermarked_frame = draw_transparent_overlay(video._frame.copy(), wormhole_watermark, (padding, video.height - height - padding), (width, height))
+    # Blend the watermark into the watermark region of the frame, in place
+    roi = video._frame[pos_y:pos_y + overlay_height, pos_x:pos_x + overlay_width]
+    # (frame * (256 - alpha) + overlay * alpha) / 256, using 16 bit integer math
+    blended = np.multiply(roi, inverse_alpha)
+    np.add(blended, premultiplied_overlay, out=blended)
+    np.right_shift(blended, 8, out=blended)
+    np.copyto(roi, blended, casting="unsafe")
 
-    # Render the watermark with the new width and height
-    blend_frames(video._frame, watermarked_frame)
+
+# Cache of precomputed watermark overlays, with (width, height, opacity) as the key
+watermark_overlay_cache: dict[tuple[int, int, float], tuple] = {}
 
 #
 # --- Frame Modifiers to render fps and other statistics ---
 #
 
 
-def render_fps(video):
+def render_fps(video, refresh_interval: float = 0.0):
     """
     Render the current fps on the current frame
     """
 
     # Render the fps
-    draw_text(video._frame, f"FPS: {video.frame_controller.average_fps}", (10, 30))
+    fps_text, = get_throttled_text(video, "fps", lambda: [f"FPS: {video.frame_controller.average_fps}"], refresh_interval)
+    draw_cached_text(video._frame, fps_text, (10, 30))
 
 
-def render_fraps_fps(video):
+def render_fraps_fps(video, refresh_interval: float = 0.0):
     """
     Render the current fps in the top right corner like fraps
     """
 
     # Get the fps
-    fps_str = "N/A" if video.frame_controller.average_fps is math.inf else str(int(video.frame_controller.average_fps))  # Fixes a small bug with inf fps
-    # Render the fps
-    draw_text(video._frame, f"{fps_str}", (video.width - len(fps_str) * 20 - 10, 30), font_color=(0, 0, 0), font_stroke=6)
-    draw_text(video._frame, f"{fps_str}", (video.width - len(fps_str) * 20 - 10, 30), font_color=(0, 255, 255))
+    fps_str, = get_throttled_text(video, "fraps_fps", lambda: [
+        "N/A" if video.frame_controller.average_fps is math.inf else str(int(video.frame_controller.average_fps))  # Fixes a small bug with inf fps
+    ], refresh_interval)
+    # Render the fps, with a black outline
+    draw_cached_text(video._frame, f"{fps_str}", (video.width - len(fps_str) * 20 - 10, 30), font_color=(0, 255, 255), outline_color=(0, 0, 0), outline_stroke=6)
 
 
-def render_full_fps(video):
+def render_full_fps(video, refresh_interval: float = 0.0):
     """
     Renders full FPS statistics on the current frame. Includes: Frame Time, Instantaneous FPS, FPS over X seconds, and Average FPS
     """
 
     # Render the fps
-    draw_multiline_text(video._frame, video.width, video.height, (0, 0), [
+    draw_multiline_text(video._frame, video.width, video.height, (0, 0), get_throttled_text(video, "full_fps", lambda: [
         f"Frame Time: {video.frame_controller.frame_time * 1000:.2f} ms",
         f"Instantaneous FPS: {video.frame_controller.instantaneous_fps:.2f}",
         f"FPS over {video.frame_controller.fps_window_delta:.1f} Seconds: {video.frame_controller.fps_window:.2f}",
         f"Average FPS: {video.frame_controller.average_fps:.2f}"
-    ])
+    ], refresh_interval))
 
 
-def render_debug_info(video):
+def render_debug_info(video, refresh_interval: float = 0.0):
     """
     Renders full debug information about the video stream
     """
 
     # Render the fps
     from wormhole.version import __version__
-    draw_multiline_text(video._frame, video.width, video.height, (0, 0), [
+    draw_multiline_text(video._frame, video.width, video.height, (0, 0), get_throttled_text(video, "debug_info", lambda: [
         f"=== [Debug Information] ===",
         f"Wormhole Version: {__version__}",
         f">>> Video Information <<<",
@@ -286,7 +462,7 @@ def render_debug_info(video):
         *[str(subscriber) for subscriber in video.frame_subscribers],
 
         f"=== [Debug Information] ===",
-    ])
+    ], refresh_interval))
 
 
 #
@@ -294,21 +470,271 @@ def render_debug_info(video):
 #
 
 
+def tile_safe(modifier):
+    """
+    Marks a frame modifier as tile-safe. Tile-safe modifiers only modify each pixel based on itself,
+    so they can be run on horizontal bands of the frame in parallel
+    """
+
+    modifier.tile_safe = True
+    return modifier
+
+
+def read_only(modifier):
+    """
+    Marks a frame modifier as read-only. Read-only modifiers never write to the frame,
+    so frames shared with other videos do not need to be copied before they are run
+    """
+
+    modifier.read_only = True
+    return modifier
+
+
+@tile_safe
 def grayscale_filter(video):
     """
     Makes video black and white
     """
 
-    cv2.cvtColor(video._frame, cv2.COLOR_BGR2GRAY)
-    cv2.cvtColor(video._frame, cv2.COLOR_GRAY2BGR)
+    gray_frame = cv2.cvtColor(video._frame, cv2.COLOR_BGR2GRAY)
+    cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2BGR, dst=video._frame)
 
 
+@tile_safe
 def inverse_filter(video):
     """
     Inverts all colors in the video
     """
 
-    cv2.bitwise_not(video._frame)
+    cv2.bitwise_not(video._frame, dst=video._frame)
+
+
+class FilterChain():
+    """
+    Frame Modifier that applies a chain of filters to the video.
+    Compatible filters are fused together so that the frame is processed in as few passes as possible.
+
+    Filters are given as tuples of (filter_name, *args). Supported filters are:
+        ("lut", table) -> Applies a lookup table of 256 values (or 256x3 values for per-channel tables)
+        ("invert",) -> Inverts all colors
+        ("brightness_contrast", contrast, brightness) -> Scales each pixel by contrast, then adds brightness
+        ("grayscale",) -> Makes video black and white
+        ("crop", x, y, width, height) -> Crops the frame. Final frame is scaled back to the video size
+        ("resize", width, height) -> Resizes the frame. Final frame is scaled back to the video size
+        ("flip", flip_code) -> Flips the frame. Uses the same flip codes as cv2.flip
+    """
+
+    def __init__(self, filters: list[Union[str, tuple]]):
+        # Parse the filters. Filters without any arguments can also be passed as strings
+        self.filters: list[tuple] = [(f, ) if isinstance(f, str) else tuple(f) for f in filters]
+
+        # Compile the filters into fused stages
+        self.stages: list[tuple] = self.compile_filters(self.filters)
+
+        # Chain can be run on tiles if it only contains per-pixel filters
+        self.tile_safe: bool = all(stage[0] in ("lut", "grayscale") for stage in self.stages)
+
+        # Preallocated buffers for intermediate frames, with the buffer name and shape as the key
+        # Buffers are kept per thread, as tiles of the same frame may be processed at the same time
+        self.buffers = local()
+
+    def __repr__(self):
+        return f"FilterChain({', '.join(f[0] for f in self.filters)})"
+
+    # Create a 256x3 lookup table for a color filter
+    @staticmethod
+    def create_lut(name: str, *args):
+        values = np.arange(256, dtype=np.float32)
+        if name == "lut":
+            table = np.asarray(args[0])
+        elif name == "invert":
+            table = 255 - values
+        elif name == "brightness_contrast":
+            contrast, brightness = args
+            table = values * contrast + brightness
+        else:
+            raise ValueError(f"Unknown Color Filter {name}!")
+
+        # Expand single channel tables to all three channels
+        table = np.clip(np.rint(table), 0, 255).astype(np.uint8)
+        if table.size == 256:
+            table = np.repeat(table.reshape(256, 1), 3, axis=1)
+        return table.reshape(256, 3)
+
+    # Compile list of filters into list of stages, fusing together compatible filters
+    @staticmethod
+    def compile_filters(filters: list[tuple]):
+        stages = []
+        for name, *args in filters:
+            last_stage = stages[-1][0] if stages else None
+
+            # All color filters are merged into a single lookup table
+            if name in ("lut", "invert", "brightness_contrast"):
+                table = FilterChain.create_lut(name, *args)
+                if last_stage == "lut":
+                    table = np.take_along_axis(table, stages.pop()[1], axis=0)
+                stages.append(("lut", table))
+            # Grayscale filters do nothing if applied twice
+            elif name == "grayscale":
+                if last_stage != "grayscale":
+                    stages.append(("grayscale", ))
+            # Crops of crops are merged into a single crop
+            elif name == "crop":
+                x, y, width, height = args
+                if last_stage == "crop":
+                    last_x, last_y, last_width, last_height = stages.pop()[1]
+                    # The second crop can not read pixels outside of the first crop
+                    width = max(min(width, last_width - x), 0)
+                    height = max(min(height, last_height - y), 0)
+                    x, y = last_x + x, last_y + y
+                stages.append(("crop", (x, y, width, height)))
+            # Only the last resize matters if resizes are chained
+            elif name == "resize":
+                if last_stage == "resize":
+                    stages.pop()
+                stages.append(("resize", tuple(args)))
+            # Flips are merged into a single flip as (flip_vertical, flip_horizontal)
+            elif name == "flip":
+                flip_code, = args
+                flip = (flip_code <= 0, flip_code != 0)
+                if last_stage == "flip":
+                    last_flip = stages.pop()[1]
+                    flip = (flip[0] != last_flip[0], flip[1] != last_flip[1])
+                if any(flip):
+                    stages.append(("flip", flip))
+            else:
+                raise ValueError(f"Unknown Filter {name}!")
+
+        # Find the fastest way to apply each lookup table, removing tables that do nothing
+        lut_stages = []
+        for name, *args in stages:
+            if name == "lut":
+                table, = args
+                lut_filter = FilterChain.create_lut_filter(table)
+                if lut_filter:
+                    lut_stages.append(("lut", table, lut_filter))
+            else:
+                lut_stages.append((name, *args))
+        return lut_stages
+
+    # Get the fastest function that applies a 256x3 lookup table, or None if the table does nothing
+    @staticmethod
+    def create_lut_filter(table: np.ndarray):
+        values = np.arange(256, dtype=np.uint8)
+
+        # Table is different for each channel, so a full lookup table is needed
+        if not (table == table[:, :1]).all():
+            channel_table = table.reshape(256, 1, 3).copy()
+            return lambda src, dst: cv2.LUT(src, channel_table, dst=dst)
+
+        # Check for tables that can be done with faster functions
+        table = table[:, 0].copy()
+        if (table == values).all():
+            return None
+        if (table == 255 - values).all():
+            return lambda src, dst: cv2.bitwise_not(src, dst=dst)
+
+        # Check if the table is a linear transform that can be done with convertScaleAbs
+        unsaturated = np.nonzero((table > 0) & (table < 255))[0]
+        if len(unsaturated) >= 2:
+            low, high = unsaturated[0], unsaturated[-1]
+            contrast = (int(table[high]) - int(table[low])) / (high - low)
+            brightness = int(table[low]) - contrast * low
+            if (cv2.convertScaleAbs(values, alpha=contrast, beta=brightness).ravel() == table).all():
+                return lambda src, dst: cv2.convertScaleAbs(src, dst=dst, alpha=contrast, beta=brightness)
+
+        return lambda src, dst: cv2.LUT(src, table, dst=dst)
+
+    # Get a preallocated buffer with a given name and shape
+    def get_buffer(self, name: str, shape: tuple):
+        buffers = self.buffers.__dict__
+        buffer = buffers.get((name, shape))
+        if buffer is None:
+            buffer = np.empty(shape, np.uint8)
+            buffers[(name, shape)] = buffer
+        return buffer
+
+    # Get the output for a stage. Stages are done in place, unless the current frame is a cropped view of the original frame
+    def get_output(self, name: str, current: np.ndarray, frame: np.ndarray):
+        if current is frame or not np.may_share_memory(current, frame):
+            return current
+        return self.get_buffer(name, current.shape)
+
+    # Apply all filter stages on a frame. Returns the filtered frame, which may be the original frame or an internal buffer
+    def apply(self, frame: np.ndarray):
+        current = frame
+        stages = iter(self.stages)
+        for name, *args in stages:
+            if name == "lut":
+                _, lut_filter = args
+                current = lut_filter(current, self.get_output("lut", current, frame))
+            elif name == "grayscale":
+                gray_frame = cv2.cvtColor(current, cv2.COLOR_BGR2GRAY, dst=self.get_buffer("gray", current.shape[:2]))
+                output = self.get_output("grayscale", current, frame)
+                # If the next stage is a color filter that is the same on all channels, apply it to the gray frame directly
+                next_stage = next(stages, None)
+                if next_stage and next_stage[0] == "lut" and (next_stage[1] == next_stage[1][:, :1]).all():
+                    next_stage[2](gray_frame, gray_frame)
+                    next_stage = None
+                current = cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2BGR, dst=output)
+                # Run the next stage normally if it could not be fused
+                if next_stage:
+                    stages = iter([next_stage, *stages])
+            elif name == "crop":
+                x, y, width, height = args[0]
+                current = current[y:y + height, x:x + width]
+            elif name == "resize":
+                width, height = args[0]
+                interpolation = cv2.INTER_AREA if width < current.shape[1] else cv2.INTER_LINEAR
+                current = cv2.resize(current, (width, height), dst=self.get_buffer("resize", (height, width, current.shape[2])), interpolation=interpolation)
+            elif name == "flip":
+                flip_vertical, flip_horizontal = args[0]
+                flip_code = -1 if flip_vertical and flip_horizontal else (0 if flip_vertical else 1)
+                current = cv2.flip(current, flip_code, dst=self.get_output("flip", current, frame))
+        return current
+
+    def __call__(self, video):
+        frame = video._frame
+        filtered_frame = self.apply(frame)
+
+        # Filters were done in place, nothing else needs to be done
+        if filtered_frame is frame:
+            return
+
+        # Write the filtered frame back into the video frame, scaling it back to the video size if needed
+        if filtered_frame.shape == frame.shape:
+            np.copyto(frame, filtered_frame)
+        else:
+            if np.may_share_memory(filtered_frame, frame):
+                filtered_frame = filtered_frame.copy()
+            cv2.resize(filtered_frame, (frame.shape[1], frame.shape[0]), dst=frame)
+
+
+def get_tile_pool():
+    """
+    Gets the thread pool shared by all videos to run tile-safe frame modifiers.
+    OpenCV and NumPy release the GIL, so tiles are processed in parallel
+    """
+
+    global tile_pool
+    with tile_pool_lock:
+        if tile_pool is None:
+            try:
+                # If gevent monkey patched threading, use gevent's pool of native threads so tiles are still run in parallel
+                from gevent import monkey
+                if monkey.is_module_patched("threading"):
+                    from gevent.threadpool import ThreadPoolExecutor
+                else:
+                    from concurrent.futures import ThreadPoolExecutor
+            except ModuleNotFoundError:
+                from concurrent.futures import ThreadPoolExecutor
+            tile_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+    return tile_pool
+
+
+# Thread pool for tile-safe frame modifiers. Created when first used
+tile_pool = None
+tile_pool_lock = Lock()
 
 
 #
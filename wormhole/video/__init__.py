@@ -1,8 +1,28 @@
-from wormhole.video.abstractvideo import *
-from wormhole.video.customvideo import *
-from wormhole.video.cameravideo import *
-from wormhole.video.filevideo import *
-from wormhole.video.imagevideo import *
-from wormhole.video.videocopy import *
-from wormhole.video.videorender import *
-from wormhole.video.videowriter import *
+from wormhole.lazyimport import create_lazy_importer
+
+# Submodule each name is defined in. Submodules are only imported once one of their names is used
+lazy_names = {
+    # Abstract Video
+    "AbstractVideo": "abstractvideo",
+    "AsyncSubscriber": "abstractvideo",
+    "DerivedFrame": "abstractvideo",
+    "FrameTile": "abstractvideo",
+    "DERIVED_COLOR_CONVERSIONS": "abstractvideo",
+    # Video Sources
+    "CustomVideo": "customvideo",
+    "CameraVideo": "cameravideo",
+    "FileVideo": "filevideo",
+    "ImageVideo": "imagevideo",
+    "MosaicVideo": "mosaicvideo",
+    "SoftCopy": "videocopy",
+    "HardCopy": "videocopy",
+    # Video Outputs
+    "render_video": "videorender",
+    "get_video_fourcc": "videowriter",
+    "write_video": "videowriter",
+    "threaded_video_writer": "videowriter",
+    "VideoRecorder": "videowriter",
+    "MotionRecorder": "videowriter",
+}
+__all__ = list(lazy_names)
+__getattr__, __dir__ = create_lazy_importer(__name__, lazy_names)
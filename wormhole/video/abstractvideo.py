@@ -1,9 +1,12 @@
+import cv2
 import logging
 import numpy as np
 import time
 import traceback
-from typing import Callable
-from wormhole.utils import blank_frame_color, draw_text, FrameController
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from typing import Callable, Optional, Union
+from wormhole.utils import blank_frame_color, draw_text, get_tile_pool, FrameController
 
 
 class AbstractVideo():
@@ -19,7 +22,9 @@ class AbstractVideo():
         pixel_size: int = 3,
         print_fps: bool = False,
         frame_modifiers=None,
-        frame_subscribers=None
+        frame_subscribers=None,
+        frame_tiles: int = 1,
+        pipeline_stages: int = 0
     ):
         # Basic Video Properties
         self.width: int = width
@@ -27,14 +32,32 @@ class AbstractVideo():
         self.height: int = height
         self.max_fps: float = max_fps
         self.print_fps: bool = print_fps
+        # Number of horizontal bands to split the frame into for tile-safe frame modifiers. 1 disables tiling
+        self.frame_tiles: int = frame_tiles
+        # Number of pipeline stages to split the frame modifiers into. 0 runs all modifiers in set_frame
+        self.pipeline_stages: int = pipeline_stages
 
         # Sanity Check
         if 0 > self.width or 0 > self.height or 0 > self.max_fps:
             raise ValueError("Video Properties cannot smaller than 0!")
+        if self.frame_tiles < 1:
+            raise ValueError("Frame Tiles must be at least 1!")
+        if self.pipeline_stages < 0:
+            raise ValueError("Pipeline Stages cannot be smaller than 0!")
 
         # Video Information
         self._frame: np.ndarray = np.zeros((width, height, self.pixel_size), np.uint8)
         self.finished_frame: np.ndarray = self._frame
+        # Frame Version -> Incremented every time a new finished frame is set. Used to check if the frame has changed
+        self.frame_version: int = 0
+        # Number of errors raised by frame modifiers. Used to check if a frame was rendered with an error
+        self.modifier_errors: int = 0
+
+        # Derived Frames -> Cache of resized, color converted, and downscaled versions of the finished frame
+        # Shared by everything that reads this video, and cleared every time the finished frame is replaced
+        # Stored as (size, color, level) -> (frame version, DerivedFrame)
+        self.derived_frames: dict[tuple, tuple[int, DerivedFrame]] = {}
+        self.derived_frames_lock = Lock()
 
         # Frame Modifiers -> List of functions that change the output video when a new frame arrives
         self.frame_modifiers: list[Callable[[AbstractVideo], None]] = frame_modifiers or []
@@ -43,31 +66,121 @@ class AbstractVideo():
         # Set up Frame Controller
         self.frame_controller = FrameController(self.max_fps, print_fps=self.print_fps)
 
+        # Set up Frame Pipeline
+        # Each modifier stage and the publisher run in their own thread, connected by bounded queues
+        # Frames are passed as (frame, frame modifiers) so every frame runs the same list of modifiers
+        # Each queue is FIFO and each stage has one thread, so frames are published in order
+        self.pipeline_queues: list[Queue] = []
+        if self.pipeline_stages:
+            self.pipeline_queues = [Queue(maxsize=1) for _ in range(self.pipeline_stages + 1)]
+            for stage in range(self.pipeline_stages):
+                Thread(target=self.pipeline_stage, args=(stage, ), daemon=True).start()
+            Thread(target=self.pipeline_publisher, daemon=True).start()
+
     # Add a function to the frame modifiers
     def add_frame_modifier(self, modifier):
         self.frame_modifiers.append(modifier)
 
     # Add a function to the frame subscribers
-    def add_frame_subscriber(self, subscriber):
+    # Subscribers are either called inline in the video thread, or asynchronously in their own thread
+    def add_frame_subscriber(self, subscriber, mode: str = "inline", policy: str = "latest", queue_size: int = 1):
+        if mode == "async":
+            subscriber = AsyncSubscriber(subscriber, policy=policy, queue_size=queue_size)
+        elif mode != "inline":
+            raise ValueError(f"Unknown Subscriber Mode {mode}! Supported Modes: 'inline', 'async'")
         self.frame_subscribers.append(subscriber)
+        return subscriber
+
+    # Get delivery statistics for all frame subscribers
+    def get_subscriber_stats(self):
+        return [
+            subscriber.get_stats() if isinstance(subscriber, AsyncSubscriber) else {"subscriber": str(subscriber), "mode": "inline"}
+            for subscriber in self.frame_subscribers
+        ]
 
     # Call all frame modifiers
     def call_frame_modifiers(self):
-        for modifier in self.frame_modifiers:
-            try:
-                modifier(self)
-            except Exception as error:
-                logging.error(f"Error While Running Frame Modifier {modifier}")
-                traceback.print_exc()
+        self.apply_frame_modifiers(self, self.frame_modifiers)
+
+    # Apply a list of frame modifiers onto a target, which is either the video itself or a FrameTile
+    def apply_frame_modifiers(self, target, modifiers):
+        index = 0
+        while index < len(modifiers):
+            # Group together consecutive tile-safe modifiers, so they are all run on a tile at once
+            if self.frame_tiles > 1 and getattr(modifiers[index], "tile_safe", False):
+                end = index
+                while end < len(modifiers) and getattr(modifiers[end], "tile_safe", False):
+                    end += 1
+                self.ensure_writable_frame(target, modifiers[index:end])
+                self.apply_tiled_frame_modifiers(target, modifiers[index:end])
+                index = end
+            else:
+                self.ensure_writable_frame(target, modifiers[index:index + 1])
+                try:
+                    modifiers[index](target)
+                except Exception as error:
+                    self.handle_modifier_error(modifiers[index], error, target)
+                index += 1
+
+    # Copy-on-write for frames shared with other videos
+    # Shared frames are read-only, so a private copy is made before any modifier that is not read-only runs
+    def ensure_writable_frame(self, target, modifiers):
+        if not target._frame.flags.writeable and not all(getattr(modifier, "read_only", False) for modifier in modifiers):
+            target._frame = target._frame.copy()
+
+    # Apply a group of tile-safe frame modifiers on horizontal bands of the target frame in parallel
+    def apply_tiled_frame_modifiers(self, target, modifiers):
+        # Split the frame into bands
+        frame = target._frame
+        tiles = min(self.frame_tiles, frame.shape[0]) or 1
+        bounds = [frame.shape[0] * i // tiles for i in range(tiles + 1)]
+        tile_offset = getattr(target, "tile_offset", 0)
+
+        # Run all modifiers on a tile, returning any errors that occurred
+        def run_modifiers(start, end):
+            tile = FrameTile(self, frame[start:end], tile_offset + start)
+            errors = []
+            for modifier in modifiers:
+                try:
+                    modifier(tile)
+                except Exception as error:
+                    errors.append((modifier, error))
+            return errors
 
-                # Render error to video frame
-                draw_text(self._frame, "ERROR!", (10, 60), font_color=(0, 0, 255), font_size=2, font_stroke=4)
-                draw_text(self._frame, f"Error While Running Frame Modifier {modifier}!", (10, 100))
-                draw_text(self._frame, f"Error: {error}", (10, 130), font_size=0.5, font_stroke=1)
+        # Process the first tile on this thread while the rest run on the shared tile pool
+        tile_pool = get_tile_pool()
+        futures = [tile_pool.submit(run_modifiers, bounds[i], bounds[i + 1]) for i in range(1, tiles)]
+        errors = run_modifiers(bounds[0], bounds[1])
+        for future in futures:
+            errors += future.result()
+
+        # Render errors after all tiles are finished, so they are drawn on the full frame
+        reported_modifiers = []
+        for modifier, error in errors:
+            if modifier not in reported_modifiers:
+                reported_modifiers.append(modifier)
+                self.handle_modifier_error(modifier, error, target)
+
+    # Log and render an error from a frame modifier onto the frame of the target
+    def handle_modifier_error(self, modifier, error, target):
+        self.modifier_errors += 1
+        logging.error(f"Error While Running Frame Modifier {modifier}")
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+        # Frame is still shared if only read-only modifiers ran, so it must be copied before drawing on it
+        if not target._frame.flags.writeable:
+            target._frame = target._frame.copy()
+        frame = target._frame
+
+        # Render error to video frame
+        draw_text(frame, "ERROR!", (10, 60), font_color=(0, 0, 255), font_size=2, font_stroke=4)
+        draw_text(frame, f"Error While Running Frame Modifier {modifier}!", (10, 100))
+        draw_text(frame, f"Error: {error}", (10, 130), font_size=0.5, font_stroke=1)
 
     # Call all frame subscribers
     def call_frame_subscribers(self):
-        for subscriber in self.frame_subscribers:
+        # Iterate over a copy, as subscribers can be removed from other threads
+        for subscriber in list(self.frame_subscribers):
             try:
                 subscriber(self)
             except Exception as e:
@@ -78,18 +191,129 @@ class AbstractVideo():
     def get_frame(self):
         return self.finished_frame
 
+    # Get a derived version of the current finished frame as a read-only frame
+    # size -> (width, height) to resize the frame to
+    # color -> Color space to convert the frame to. Either "gray", "rgb", "hsv", "lab", or any cv2 color conversion code
+    # level -> Image pyramid level. Each level is half the size of the previous level
+    # Each derived frame is computed at most once per frame, so multiple readers only do the work once
+    def get_derived(self, size: Optional[tuple[int, int]] = None, color: Optional[Union[str, int]] = None, level: int = 0):
+        # Read the version before the frame, so a frame is never cached under a newer version
+        version = self.frame_version
+        frame = self.finished_frame
+        return self.compute_derived(version, frame, tuple(size) if size else None, color, level)
+
+    # Get a derived frame from the cache, computing it if needed. Frames without a version are never cached
+    def compute_derived(self, version: Optional[int], frame: np.ndarray, size: Optional[tuple[int, int]], color: Optional[Union[str, int]], level: int):
+        # The base frame is shared as is
+        if size is None and color is None and level == 0:
+            shared_frame = frame.view()
+            shared_frame.flags.writeable = False
+            return shared_frame
+
+        # Frames without a version are not the finished frame, so they are not cached
+        if version is None:
+            return self.create_derived(version, frame, size, color, level)
+
+        # Check if the frame is already cached or being computed by another thread
+        key = (size, color, level)
+        with self.derived_frames_lock:
+            entry = self.derived_frames.get(key)
+            computing = entry is None or entry[0] != version
+            if computing:
+                entry = (version, DerivedFrame())
+                # Only cache frames that are still the current frame
+                if version == self.frame_version:
+                    self.derived_frames[key] = entry
+        derived = entry[1]
+
+        # Wait for the other thread to finish computing the frame
+        if not computing:
+            derived.ready.wait()
+            if derived.error:
+                raise derived.error
+            return derived.frame
+
+        # Compute the derived frame
+        try:
+            derived.frame = self.create_derived(version, frame, size, color, level)
+            return derived.frame
+        except Exception as e:
+            derived.error = e
+            raise
+        finally:
+            derived.ready.set()
+
+    # Create a derived frame. Derived frames are built from other derived frames, so intermediate steps are also shared
+    def create_derived(self, version: Optional[int], frame: np.ndarray, size: Optional[tuple[int, int]], color: Optional[Union[str, int]], level: int):
+        # Color conversion is done last, after the frame is resized
+        if color is not None:
+            source = self.compute_derived(version, frame, size, None, level)
+            derived_frame = cv2.cvtColor(source, DERIVED_COLOR_CONVERSIONS.get(color, color))  # type: ignore
+        # Resize the frame from its pyramid level
+        elif size is not None:
+            source = self.compute_derived(version, frame, None, None, level)
+            if (source.shape[1], source.shape[0]) == size:
+                return source
+            derived_frame = cv2.resize(source, size)
+        # Downscale the previous pyramid level
+        else:
+            source = self.compute_derived(version, frame, None, None, level - 1)
+            derived_frame = cv2.pyrDown(source)
+
+        derived_frame.flags.writeable = False
+        return derived_frame
+
+    # Publish a finished frame to everything that reads this video
+    def publish_frame(self, frame: np.ndarray):
+        self.finished_frame = frame
+        self.derived_frames = {}
+        self.frame_version += 1
+
     # Set the current frame
     def set_frame(self, frame: np.ndarray):
         # Sanity Check Frame Size
         if frame.size != self.width * self.height * self.pixel_size:
             raise ValueError(f"Frame Size Does Not Match! Frame Size: {frame.size}, Expected Size: {self.height * self.width * self.pixel_size}")
 
+        # If pipelined, pass the frame to the first pipeline stage
+        # This blocks if the pipeline is full, so the video source cannot run ahead of the slowest stage
+        if self.pipeline_stages:
+            self.pipeline_queues[0].put((frame, list(self.frame_modifiers)))
+            return
+
         # Set Frame
         self._frame = frame
         self.call_frame_modifiers()
-        self.finished_frame = self._frame
+        self.publish_frame(self._frame)
         self.call_frame_subscribers()
 
+    # Pipeline stage thread. Runs its share of the frame modifiers on every frame, then passes it to the next stage
+    def pipeline_stage(self, stage: int):
+        input_queue, output_queue = self.pipeline_queues[stage], self.pipeline_queues[stage + 1]
+        while True:
+            frame, modifiers = input_queue.get()
+            try:
+                # Split the modifiers evenly between all stages
+                start = len(modifiers) * stage // self.pipeline_stages
+                end = len(modifiers) * (stage + 1) // self.pipeline_stages
+                if start < end:
+                    target = FrameTile(self, frame)
+                    self.apply_frame_modifiers(target, modifiers[start:end])
+                    # Frame may have been replaced by a modifier, or by a private copy
+                    frame = target._frame
+            except Exception as e:
+                logging.error(f"Error While Running Pipeline Stage {stage}: {e}")
+                traceback.print_exc()
+            output_queue.put((frame, modifiers))
+
+    # Pipeline publisher thread. Sets the finished frame and calls all frame subscribers, in frame order
+    def pipeline_publisher(self):
+        while True:
+            frame, _ = self.pipeline_queues[-1].get()
+            self._frame = frame
+            self.publish_frame(frame)
+            self.call_frame_subscribers()
+
     # Set the current frame to a blank frame
     def set_blank_frame(self):
         new_frame = np.zeros((self.width, self.height, self.pixel_size), np.uint8)
@@ -106,7 +330,7 @@ class AbstractVideo():
             error_frame = draw_text(error_frame, "ERROR!", (10, 60), font_color=(0, 0, 255), font_size=2, font_stroke=4)
             error_frame = draw_text(error_frame, message, (10, 100))
             error_frame = draw_text(error_frame, f"Error: {error}", (10, 130), font_size=0.5, font_stroke=1)
-            self.finished_frame = error_frame
+            self.publish_frame(error_frame)
 
             # Sleep one second so its not hotlooping like crazy
             time.sleep(1)
@@ -116,3 +340,131 @@ class AbstractVideo():
         except Exception as e:
             print(f"Error while processing error frame!!!!! {e}")
             print(f"Something is seriously wrong with this video object or this instance of Wormhole!")
+
+
+# Color spaces supported by get_derived, and their cv2 color conversion codes
+DERIVED_COLOR_CONVERSIONS = {
+    "gray": cv2.COLOR_BGR2GRAY,
+    "rgb": cv2.COLOR_BGR2RGB,
+    "hsv": cv2.COLOR_BGR2HSV,
+    "lab": cv2.COLOR_BGR2LAB,
+}
+
+
+class DerivedFrame():
+    """
+    Derived frame in the derived frame cache. Other threads wait on ready while the frame is being computed
+    """
+
+    def __init__(self):
+        self.ready = Event()
+        self.frame: Optional[np.ndarray] = None
+        self.error: Optional[Exception] = None
+
+
+class FrameTile():
+    """
+    Frame (or horizontal band of a frame) that is processed separately from the video's current frame.
+    Passed to frame modifiers in place of the video. All other attributes are read from the original video
+    """
+
+    def __init__(self, video: AbstractVideo, frame: np.ndarray, tile_offset: int = 0):
+        self.video = video
+        self._frame = frame
+        self.height = frame.shape[0]
+        self.tile_offset = tile_offset
+
+    def get_frame(self):
+        return self._frame
+
+    # Derived frames are only cached if this is a snapshot of a finished frame
+    def get_derived(self, size: Optional[tuple[int, int]] = None, color: Optional[Union[str, int]] = None, level: int = 0):
+        return self.video.compute_derived(self.__dict__.get("frame_version"), self._frame, tuple(size) if size else None, color, level)
+
+    def __getattr__(self, name):
+        return getattr(self.video, name)
+
+
+class AsyncSubscriber():
+    """
+    Wraps a frame subscriber so that it is called in its own thread instead of the video thread.
+    Frames are passed through a bounded queue, using one of the following policies when the queue is full:
+        "latest" -> Drops the oldest queued frame, so the subscriber always gets the newest frame
+        "block" -> Waits until the subscriber catches up. The video thread is slowed down to the subscriber's speed
+    """
+
+    def __init__(self, subscriber: Callable, policy: str = "latest", queue_size: int = 1):
+        # Sanity Check
+        if policy not in ("latest", "block"):
+            raise ValueError(f"Unknown Subscriber Policy {policy}! Supported Policies: 'latest', 'block'")
+        if queue_size < 1:
+            raise ValueError("Queue Size must be at least 1!")
+
+        self.subscriber = subscriber
+        self.policy = policy
+        self.frame_queue: Queue = Queue(maxsize=queue_size)
+
+        # Subscriber Statistics
+        self.frames_received: int = 0
+        self.frames_delivered: int = 0
+        self.frames_dropped: int = 0
+        self.last_lag: float = 0.0
+        self.max_lag: float = 0.0
+
+        # Start Subscriber Thread
+        self.subscriber_thread = Thread(target=self.subscriber_loop, daemon=True)
+        self.subscriber_thread.start()
+
+    def __repr__(self):
+        return f"AsyncSubscriber({self.subscriber}, policy={self.policy}, dropped={self.frames_dropped}, lag={self.last_lag * 1000:.2f} ms)"
+
+    def get_stats(self):
+        return {
+            "subscriber": str(self.subscriber),
+            "mode": "async",
+            "policy": self.policy,
+            "queued": self.frame_queue.qsize(),
+            "frames_received": self.frames_received,
+            "frames_delivered": self.frames_delivered,
+            "frames_dropped": self.frames_dropped,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
+
+    # Called by the video thread. Queues the current frame for the subscriber thread
+    def __call__(self, video):
+        # Snapshot the current frame, so the subscriber gets this frame even if the video moves on
+        snapshot = FrameTile(video, video.get_frame())
+        snapshot.frame_version = video.frame_version
+        self.frames_received += 1
+
+        if self.policy == "block":
+            self.frame_queue.put((time.time(), snapshot))
+            return
+
+        # Drop the oldest frames until the new frame fits
+        while True:
+            try:
+                self.frame_queue.put_nowait((time.time(), snapshot))
+                return
+            except Full:
+                try:
+                    self.frame_queue.get_nowait()
+                    self.frames_dropped += 1
+                except Empty:
+                    pass
+
+    def subscriber_loop(self):
+        while True:
+            queued_time, snapshot = self.frame_queue.get()
+
+            # Update lag statistics
+            self.last_lag = time.time() - queued_time
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+            try:
+                self.subscriber(snapshot)
+            except Exception as e:
+                logging.error(f"Error While Running Frame Subscriber {self.subscriber}")
+                traceback.print_exc()
+            self.frames_delivered += 1
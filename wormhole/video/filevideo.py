@@ -2,14 +2,21 @@ from wormhole.utils import FrameController
 from wormhole.video import AbstractVideo
 
 import cv2
+import logging
+import math
+import numpy as np
+import tempfile
+import time
 from pathlib import Path
+from queue import Queue
 from threading import Thread
 from typing import Any, Optional
 
 
 class FileVideo(AbstractVideo):
     """
-    Creates a video object from a video file
+    Creates a video object from a video file.
+    Frames are decoded ahead of time in a separate decoder thread and paced using the file's timestamps.
     """
 
     def __init__(
@@ -20,17 +27,34 @@ class FileVideo(AbstractVideo):
         height: Optional[int] = None,
         repeat: bool = True,
         cv2_config: Optional[list[tuple[Any, Any]]] = None,
+        prefetch_size: int = 8,
+        timestamp_pacing: bool = True,
+        cache_mode: Optional[str] = None,
+        cache_size: int = 512 * 1024 * 1024,
+        cache_file: Optional[str] = None,
         **kwargs  # Any Additional Arguments for AbstractVideo
     ):
         # Basic Video Properties
         self.filename: str = filename
         # Optional Video Properties
         self.repeat: bool = repeat
+        self.prefetch_size: int = prefetch_size
+        self.timestamp_pacing: bool = timestamp_pacing
+        # Frame Cache Properties -> Used to skip decoding when looping short videos
+        self.cache_mode: Optional[str] = cache_mode
+        self.cache_size: int = cache_size
+        self.cache_file: Optional[str] = cache_file
 
         # Check if file exists
         if not Path(self.filename).exists():
             raise Exception(f"File {self.filename} Does Not Exist!")
 
+        # Sanity Check
+        if self.prefetch_size <= 0:
+            raise ValueError("Prefetch Size must be greater than 0!")
+        if self.cache_mode not in (None, "memory", "mmap"):
+            raise ValueError(f"Unknown Cache Mode {self.cache_mode}! Supported Modes: 'memory', 'mmap'")
+
         # Open Video File
         self.cap = cv2.VideoCapture(self.filename)
 
@@ -42,10 +66,19 @@ class FileVideo(AbstractVideo):
         if cv2_config:
             for key, value in cv2_config:
                 self.cap.set(key, value)
-        # Set width, height, or fps if they are not set by default
-        max_fps = max_fps or int(self.cap.get(cv2.CAP_PROP_FPS))
-        width = width or int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = height or int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        # Get info from the video file once, so it does not need to be queried every frame
+        self.source_width: int = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.source_height: int = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.source_fps: float = self.cap.get(cv2.CAP_PROP_FPS)
+        # Some containers do not report a valid frame rate
+        if not math.isfinite(self.source_fps) or self.source_fps < 0:
+            self.source_fps = 0.0
+
+        # Set width, height, or fps if they are not set by default. Falls back to 30 fps if the file has no frame rate
+        max_fps = max_fps or int(self.source_fps) or 30
+        width = width or self.source_width
+        height = height or self.source_height
 
         # Initialize Video Object
         super().__init__(width, height, max_fps, **kwargs)
@@ -55,31 +88,198 @@ class FileVideo(AbstractVideo):
             raise ValueError("Video File Not Opened! An Error Probably Occurred.")
         # Set up Frame Controller
         self.frame_controller = FrameController(self.max_fps, print_fps=self.print_fps)
+        # Time between frames (in ms), used if the container does not report timestamps
+        self.frame_interval: float = 1000 / (self.source_fps or self.max_fps)
+
+        # Decode-Ahead Queue -> Holds (timestamp, frame) tuples decoded by the decoder thread
+        self.frame_queue: Queue = Queue(maxsize=self.prefetch_size)
+        # Playback Clock -> Maps file timestamps (in ms) to wall clock time
+        self.clock_start: Optional[float] = None
+        self.clock_base: float = 0.0
+        # Decoder Statistics
+        self.frames_decoded: int = 0
+        self.frames_skipped: int = 0
+        self.video_ended: bool = False
+
+        # Decoded Frame Cache -> Filled during the first pass of the video, then used for every other loop
+        # Caching is only useful if the video is repeated
+        self.cache_enabled: bool = self.cache_mode is not None and self.repeat
+        self.cache_complete: bool = False
+        self.cache_frames: Any = []
+        # File (or path) backing the memory-mapped cache
+        self.cache_target: Any = None
+        self.cache_timestamps: list[float] = []
+        self.cache_hits: int = 0
 
-        # Start Video Thread
+        # Start Decoder and Video Threads
+        self.video_decoder_thread = Thread(target=self.video_decoder, daemon=True)
+        self.video_decoder_thread.start()
         self.video_thread = Thread(target=self.video_loop, daemon=True)
         self.video_thread.start()
 
-    def video_loop(self):
-        # Start Video Loop
+    # Get the current playback position of the file (in ms)
+    def get_playback_position(self):
+        if self.clock_start is None:
+            return -math.inf
+        return (time.time() - self.clock_start) * 1000 + self.clock_base
+
+    # Sleep until the given file timestamp (in ms) should be displayed
+    def wait_for_timestamp(self, timestamp: float):
+        # Start the playback clock on the first frame, or resync it if playback fell too far behind (paused, errored, etc)
+        if self.clock_start is None or self.get_playback_position() - timestamp > 1000:
+            self.clock_start = time.time()
+            self.clock_base = timestamp
+            return
+
+        sleep_time = (timestamp - self.clock_base) / 1000 - (time.time() - self.clock_start)
+        if sleep_time > 0:
+            self.frame_controller.sleep_func(sleep_time)
+
+    # Add a decoded frame to the frame cache. Disables the cache if it goes over the cache size
+    def add_to_cache(self, timestamp: float, frame: np.ndarray):
+        # Determine how many frames fit in the cache
+        max_frames = self.cache_size // frame.nbytes
+
+        # Video is too large to fully cache. Free the cache and go back to decoding every loop
+        if len(self.cache_timestamps) >= max_frames:
+            logging.warning(f"Video {self.filename} is larger than the cache size of {self.cache_size} bytes. Disabling frame cache.")
+            self.cache_enabled = False
+            self.cache_frames = []
+            self.cache_timestamps = []
+            return
+
+        # Memory Cache -> Store a copy of the frame, as the original will be modified by frame modifiers
+        if self.cache_mode == "memory":
+            self.cache_frames.append(frame.copy())
+        # Memory-Mapped Cache -> Write frame into a raw file on disk
+        elif self.cache_mode == "mmap":
+            # Create the memory-mapped file on the first frame, sized by the number of frames in the video
+            if not len(self.cache_timestamps):
+                frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                if frame_count > 0:
+                    max_frames = min(max_frames, frame_count + 1)
+                self.cache_target = self.cache_file or tempfile.TemporaryFile()
+                self.cache_frames = np.memmap(self.cache_target, dtype=np.uint8, mode="w+", shape=(max_frames, *frame.shape))
+            # The reported frame count can be wrong. Grow the file if the video has more frames than expected
+            elif len(self.cache_timestamps) >= self.cache_frames.shape[0]:
+                cache_length = min(self.cache_frames.shape[0] * 2, max_frames)
+                self.cache_frames.flush()
+                self.cache_frames = np.memmap(self.cache_target, dtype=np.uint8, mode="r+", shape=(cache_length, *frame.shape))
+            self.cache_frames[len(self.cache_timestamps)] = frame
+
+        self.cache_timestamps.append(timestamp)
+
+    # Finalize the frame cache after one full loop of the video has been cached
+    def finish_cache(self):
+        # Trim the memory-mapped file to the actual number of cached frames
+        if self.cache_mode == "mmap":
+            self.cache_frames = self.cache_frames[:len(self.cache_timestamps)]
+
+        logging.info(f"Cached {len(self.cache_timestamps)} frames of video {self.filename}")
+        self.cache_complete = True
+
+    def video_decoder(self):
+        frame_interval = self.frame_interval
+        # Timestamps continue to increase across repeats so pacing stays monotonic
+        last_timestamp = -frame_interval
+        loop_offset = 0.0
+
+        # Start Decoder Loop
         while True:
             try:
-                # Read Frame
-                ret, frame = self.cap.read()
-                # Check if Frame is Valid
-                if not ret:
+                # Once the entire video is cached, serve all later loops from the cache without decoding
+                if self.cache_complete:
+                    for cached_timestamp, frame in zip(self.cache_timestamps, self.cache_frames):
+                        timestamp = cached_timestamp + loop_offset
+                        if self.timestamp_pacing and timestamp < self.get_playback_position() - frame_interval:
+                            self.frames_skipped += 1
+                            continue
+                        # Frame modifiers render in place, so the cached frame must be copied
+                        self.cache_hits += 1
+                        self.frame_queue.put((timestamp, np.array(frame)))
+                    loop_offset += last_timestamp + frame_interval
+                    continue
+
+                # Grab the next frame without decoding it
+                if not self.cap.grab():
                     if self.repeat:
+                        loop_offset += last_timestamp + frame_interval
+                        # If the entire video was cached, the file no longer needs to be read
+                        if self.cache_enabled and len(self.cache_timestamps):
+                            self.finish_cache()
+                            continue
+                        last_timestamp = -frame_interval
                         self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
                     else:
-                        self.set_blank_frame()
+                        # Signal the end of the video and stop decoding
+                        self.frame_queue.put(None)
+                        return
+
+                # Get the timestamp of the grabbed frame
+                timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+                if timestamp <= last_timestamp:
+                    timestamp = last_timestamp + frame_interval
+                last_timestamp = timestamp
+                timestamp += loop_offset
+
+                # If playback is already past this frame, skip decoding it to catch up
+                # Frames still need to be decoded while the cache is being filled
+                skip_frame = self.timestamp_pacing and timestamp < self.get_playback_position() - frame_interval
+                if skip_frame and not self.cache_enabled:
+                    self.frames_skipped += 1
+                    continue
+
+                # Decode Frame
+                ret, frame = self.cap.retrieve()
+                if not ret:
                     continue
 
                 # If sizes does not match, resize frame
-                frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                if frame_width != self.width or frame_height != self.height:
+                if self.source_width != self.width or self.source_height != self.height:
                     frame = cv2.resize(frame, (self.width, self.height))
 
+                # Add Frame to Cache
+                if self.cache_enabled:
+                    self.add_to_cache(last_timestamp, frame)
+                if skip_frame:
+                    self.frames_skipped += 1
+                    continue
+
+                # Send Frame to Video Loop
+                self.frames_decoded += 1
+                self.frame_queue.put((timestamp, frame))
+            except Exception as e:
+                # Pass the error to the video loop so it can be rendered
+                self.frame_queue.put(e)
+                time.sleep(1)
+
+    def video_loop(self):
+        # Start Video Loop
+        while True:
+            try:
+                # If the video has ended, keep rendering blank frames
+                if self.video_ended:
+                    self.set_blank_frame()
+                    self.frame_controller.next_frame()
+                    continue
+
+                # Get Next Decoded Frame
+                decoded = self.frame_queue.get()
+
+                # Check if the video has ended
+                if decoded is None:
+                    self.video_ended = True
+                    continue
+                # Check if decoder ran into an error
+                if isinstance(decoded, Exception):
+                    raise decoded
+
+                # Wait until the frame should be shown
+                timestamp, frame = decoded
+                if self.timestamp_pacing:
+                    self.wait_for_timestamp(timestamp)
+
                 # Set Frame
                 self.set_frame(frame)
                 self.frame_controller.next_frame()
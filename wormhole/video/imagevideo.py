@@ -2,7 +2,10 @@ from wormhole.utils import FrameController
 from wormhole.video import AbstractVideo
 
 import cv2
+import logging
 import math
+import os
+from pathlib import Path
 from threading import Thread
 from typing import Optional
 
@@ -10,6 +13,7 @@ from typing import Optional
 class ImageVideo(AbstractVideo):
     """
     Creates a video object from an image file.
+    If a max_fps is given, the image is only reloaded when the file changes on disk.
     """
 
     def __init__(
@@ -18,17 +22,20 @@ class ImageVideo(AbstractVideo):
         max_fps: Optional[float] = math.inf,
         width: Optional[int] = None,
         height: Optional[int] = None,
+        skip_unchanged: bool = True,
+        use_inotify: bool = False,
         **kwargs  # Any Additional Arguments for AbstractVideo
     ):
         # Basic Video Properties
         self.filename: str = filename
+        # Optional Video Properties
+        # NOTE: When skip_unchanged is enabled, frame modifiers are only called when the image changes!
+        self.skip_unchanged: bool = skip_unchanged
+        # Last known (mtime, size, inode) of the image file. None if the file needs to be reloaded
+        self.file_stat: Optional[tuple[int, int, int]] = None
 
         # Open Image File
-        self.image = cv2.imread(self.filename)
-
-        # Check if the image opens properly
-        if self.image is None:
-            raise ValueError("Image File Not Opened! An Error Probably Occurred.")
+        file_stat = self.open_image()
 
         # Get info from image
         image_height, image_width = self.image.shape[:2]
@@ -42,44 +49,96 @@ class ImageVideo(AbstractVideo):
         super().__init__(width, height, max_fps, **kwargs)
 
         # Render the first instance of the image
+        modifier_errors = self.modifier_errors
         self.render()
+        if self.modifier_errors == modifier_errors:
+            self.file_stat = file_stat
 
         # Set up Frame Controller
         self.frame_controller = FrameController(self.max_fps, print_fps=self.print_fps)
 
+        # Set up inotify to watch for file changes if requested and available
+        # The parent directory is watched, as most editors replace the file instead of writing to it
+        self.inotify = None
+        if use_inotify:
+            try:
+                from inotify_simple import INotify, flags
+                self.inotify = INotify()
+                self.inotify.add_watch(str(Path(self.filename).parent), flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+            except (ModuleNotFoundError, OSError) as e:
+                logging.warning(f"Unable to use inotify to watch {self.filename}. Falling back to checking file stats. Error: {e}")
+                self.inotify = None
+
         # If the user defined an FPS to use, start the image rendering thread
         if self.max_fps != math.inf:
             # Start Video Thread
             self.image_rendering_thread = Thread(target=self.video_loop, daemon=True)
             self.image_rendering_thread.start()
 
+    # Get the (mtime, size, inode) of the image file
+    def get_file_stat(self):
+        stat = os.stat(self.filename)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    # Check if the image file has changed since it was last opened
+    def file_changed(self):
+        # File failed to load last time, so always try again
+        if self.file_stat is None:
+            return True
+
+        # If inotify is used, only check the file if the parent directory reported an event for it
+        if self.inotify is not None:
+            events = self.inotify.read(timeout=0)
+            if not any(event.name == Path(self.filename).name for event in events):
+                return False
+
+        return self.get_file_stat() != self.file_stat
+
+    # Open the image file and return its file stats
+    # The file stats are only saved once the image is rendered, so an image that fails to render is reloaded next time
+    def open_image(self):
+        # Reset the file stats in case the image fails to open or render
+        self.file_stat = None
+        file_stat = self.get_file_stat()
+
+        # Open Image File
+        self.image = cv2.imread(self.filename)
+
+        # Check if the image opens properly
+        if self.image is None:
+            raise ValueError("Image File Not Opened! An Error Probably Occurred.")
+
+        return file_stat
+
     def render(self, reopen_file: bool = False):
         # If user requests to reopen image file, do so
+        file_stat = None
         if reopen_file:
-            # Open Image File
-            self.image = cv2.imread(self.filename)
-
-            # Check if the image opens properly
-            if self.image is None:
-                raise ValueError("Image File Not Opened! An Error Probably Occurred.")
+            file_stat = self.open_image()
 
-        # Get the new image
-        new_frame = self.image.copy()
-
-        # If sizes does not match, resize image
+        # Get the new image. If sizes does not match, resize image
         frame_height, frame_width, _ = self.image.shape
         if frame_width != self.width or frame_height != self.height:
-            new_frame = cv2.resize(new_frame, (self.width, self.height))
+            new_frame = cv2.resize(self.image, (self.width, self.height))
+        else:
+            new_frame = self.image.copy()
 
         # Set this image as the new frame
+        modifier_errors = self.modifier_errors
         self.set_frame(new_frame)
 
+        # Image rendered successfully, so it does not need to be reloaded until the file changes
+        # If a frame modifier failed, the file stats are not saved so the image is rendered again
+        if file_stat is not None and self.modifier_errors == modifier_errors:
+            self.file_stat = file_stat
+
     def video_loop(self):
         # Start Video Loop
         while True:
             try:
-                # Run render function to generate next frame
-                self.render(reopen_file=True)
+                # Run render function to generate next frame, only if the image file has changed
+                if not self.skip_unchanged or self.file_changed():
+                    self.render(reopen_file=True)
                 self.frame_controller.next_frame()
             except Exception as e:
                 self.handle_render_error(e, message="Error While Rendering Image")
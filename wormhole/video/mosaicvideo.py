@@ -0,0 +1,111 @@
+from wormhole.utils import blank_frame_color, FrameController
+from wormhole.video import AbstractVideo
+
+import cv2
+import math
+import numpy as np
+from threading import Lock, Thread
+from typing import Optional
+
+
+class MosaicVideo(AbstractVideo):
+    """
+    Creates a video object from a grid of other videos.
+    Each video is drawn into its own tile of the grid only when that video produces a new frame.
+    """
+
+    def __init__(
+        self,
+        sources: list[AbstractVideo],
+        width: int,
+        height: int,
+        max_fps: float = 30,
+        columns: Optional[int] = None,
+        background_color: tuple = (0, 0, 0),
+        **kwargs  # Any Additional Arguments for AbstractVideo
+    ):
+        # Basic Video Properties
+        self.sources: list[AbstractVideo] = sources
+
+        # Sanity Check
+        if len(self.sources) == 0:
+            raise ValueError("Mosaic Video needs at least one source video!")
+
+        # Calculate the grid size. Defaults to the smallest square grid that fits all videos
+        self.columns: int = columns or math.ceil(math.sqrt(len(self.sources)))
+        self.rows: int = math.ceil(len(self.sources) / self.columns)
+        self.tile_width: int = width // self.columns
+        self.tile_height: int = height // self.rows
+
+        # Initialize Video Object
+        super().__init__(width, height, max_fps, **kwargs)
+
+        # Set up the canvas that all tiles are drawn onto
+        self.canvas: np.ndarray = blank_frame_color(width, height, background_color)
+        self.canvas_lock = Lock()
+        # Version of the canvas. Incremented every time a tile is updated
+        self.canvas_version: int = 0
+        self.published_version: int = -1
+        # Last frame version drawn for each tile
+        self.tile_versions: list[int] = [-1] * len(self.sources)
+
+        # Draw the current frame of every video, in case some videos do not produce any new frames
+        for index in range(len(self.sources)):
+            self.update_tile(index)
+
+        # Set up Frame Controller
+        self.frame_controller = FrameController(self.max_fps, print_fps=self.print_fps)
+
+        # Create a subscriber for each video, so tiles are updated in the background as new frames come in
+        for index, source in enumerate(self.sources):
+            source.add_frame_subscriber(self.create_tile_subscriber(index), mode="async", policy="latest")
+
+        # Start Video Thread
+        self.video_thread = Thread(target=self.video_loop, daemon=True)
+        self.video_thread.start()
+
+    def create_tile_subscriber(self, index: int):
+        def tile_update_subscriber(video):
+            try:
+                self.update_tile(index)
+            except Exception as e:
+                self.handle_render_error(e, message=f"Error While Updating Mosaic Tile {index}!")
+        return tile_update_subscriber
+
+    # Draw the newest frame of a video into its tile
+    def update_tile(self, index: int):
+        source = self.sources[index]
+
+        # Skip frames that were already drawn
+        version = source.frame_version
+        if version == self.tile_versions[index]:
+            return
+        self.tile_versions[index] = version
+        frame = source.get_frame()
+
+        # Get the location of the tile
+        pos_x = (index % self.columns) * self.tile_width
+        pos_y = (index // self.columns) * self.tile_height
+        with self.canvas_lock:
+            tile = self.canvas[pos_y:pos_y + self.tile_height, pos_x:pos_x + self.tile_width]
+
+            # Resize the frame directly into the canvas
+            if frame.shape[:2] == tile.shape[:2]:
+                np.copyto(tile, frame)
+            else:
+                cv2.resize(frame, (self.tile_width, self.tile_height), dst=tile)
+            self.canvas_version += 1
+
+    def video_loop(self):
+        # Start Video Loop
+        while True:
+            try:
+                # Only publish a new frame if any tile was updated
+                if self.canvas_version != self.published_version:
+                    with self.canvas_lock:
+                        self.published_version = self.canvas_version
+                        new_frame = self.canvas.copy()
+                    self.set_frame(new_frame)
+                self.frame_controller.next_frame()
+            except Exception as e:
+                self.handle_render_error(e, message="Error While Rendering Mosaic Video!")
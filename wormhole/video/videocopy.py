@@ -1,13 +1,12 @@
 from wormhole.video import AbstractVideo
 
-import cv2
 import numpy as np
-from threading import Thread
 
 
 class SoftCopy(AbstractVideo):
     """
     Creates a soft copy of another video stream. Uses Frame Subscribers to achieve this effect.
+    Frames are shared with the original video as read-only views, and are only copied if a frame modifier writes to them.
     """
 
     def __init__(
@@ -19,15 +18,19 @@ class SoftCopy(AbstractVideo):
         super().__init__(original.width, original.height, original.max_fps, **kwargs)
 
         # Create a subscriber for the other video stream
+        # Subscriber runs in its own thread, so a slow copy does not slow down the original video
         def video_update_subscriber(video):
-            self.set_frame(np.copy(video.get_frame()))
+            shared_frame = video.get_frame().view()
+            shared_frame.flags.writeable = False
+            self.set_frame(shared_frame)
             self.frame_controller.next_frame()
-        original.add_frame_subscriber(video_update_subscriber)
+        original.add_frame_subscriber(video_update_subscriber, mode="async", policy="latest")
 
 
 class HardCopy(AbstractVideo):
     """
-    Creates a hard copy of another video stream. Uses its own frame controller to achieve this effect
+    Creates a hard copy of another video stream with its own size and frame rate.
+    Uses Frame Subscribers to wake up on new frames, and its own frame controller to limit the frame rate
     """
 
     def __init__(
@@ -41,24 +44,28 @@ class HardCopy(AbstractVideo):
         # Initialize Video Object with the NEW parameters
         super().__init__(width, height, max_fps, **kwargs)
         self.original = original
+        # Version of the original frame that was last copied
+        self.last_version: int = -1
 
-        # Start Video Thread
-        self.video_thread = Thread(target=self.video_loop, daemon=True)
-        self.video_thread.start()
+        # Copy the current frame of the original video, in case it does not produce any new frames
+        self.update_frame()
 
-    def video_loop(self):
-        # Start Video Loop
-        while True:
+        # Create a subscriber for the other video stream
+        # Subscriber runs in its own thread, so a slow copy does not slow down the original video
+        def video_update_subscriber(video):
             try:
-                # Get the new video data
-                new_frame = np.copy(self.original.get_frame())
-
-                # If sizes does not match, resize frame
-                if self.original.width != self.width or self.original.height != self.height:
-                    new_frame = cv2.resize(new_frame, (self.width, self.height))
-
-                # Set Frame Size
-                self.set_frame(new_frame)
+                self.update_frame()
                 self.frame_controller.next_frame()
             except Exception as e:
                 self.handle_render_error(e, message="Error While Reading Video Copy!")
+        original.add_frame_subscriber(video_update_subscriber, mode="async", policy="latest")
+
+    def update_frame(self):
+        # Skip frames that were already copied
+        version = self.original.frame_version
+        if version == self.last_version:
+            return
+        self.last_version = version
+
+        # Get the resized frame directly from the original video. Resized frames are shared between all copies of the same size
+        self.set_frame(self.original.get_derived(size=(self.width, self.height)))
@@ -21,8 +21,7 @@ def render_video(
 
     # Hot loop for video rendering
     while True:
-        frame = video.get_frame()
-        cv2.imshow(window_name, cv2.resize(frame, (width, height)))
+        cv2.imshow(window_name, video.get_derived(size=(width, height)))
         # Check if q is sent to exit video
         if cv2.waitKey(1) == ord('q'):
             break
@@ -1,28 +1,23 @@
 from wormhole.utils import FrameController
 from wormhole.video import AbstractVideo
 
+from collections import deque
 from pathlib import Path
-from threading import Thread
+from queue import Full, Queue
+from threading import Event, Thread
 from typing import Optional
+import atexit
 import cv2
 import logging
+import math
+import numpy as np
+import os
+import time
+import traceback
 
 
-def write_video(
-    video: AbstractVideo,
-    filename: str,
-    encoding: Optional[str | tuple | int] = None,
-    width: Optional[int] = None,
-    height: Optional[int] = None,
-    max_fps: Optional[float] = None,
-    print_fps: bool = False
-):
-    width = width or video.width
-    height = height or video.height
-    max_fps = max_fps or video.max_fps
-    frame_controller = FrameController(max_fps, print_fps=print_fps)
-
-    # Get File Encoding Format
+# Get the FourCC code for the given encoding. Autodetects the encoding from the file extension if not given
+def get_video_fourcc(filename: str, encoding: Optional[str | tuple | int] = None):
     if isinstance(encoding, int):
         fourcc = encoding
     elif isinstance(encoding, tuple) or isinstance(encoding, str):
@@ -45,6 +40,26 @@ def write_video(
             logging.warning("Unknown File Encoding Format. Using OepnCV Default.")
             fourcc = -1
 
+    return fourcc
+
+
+def write_video(
+    video: AbstractVideo,
+    filename: str,
+    encoding: Optional[str | tuple | int] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    max_fps: Optional[float] = None,
+    print_fps: bool = False
+):
+    width = width or video.width
+    height = height or video.height
+    max_fps = max_fps or video.max_fps
+    frame_controller = FrameController(max_fps, print_fps=print_fps)
+
+    # Get File Encoding Format
+    fourcc = get_video_fourcc(filename, encoding)
+
     # Create File Writer Object
     video_writer = cv2.VideoWriter(filename, fourcc, max_fps, (width, height))
 
@@ -57,11 +72,8 @@ def write_video(
         if not video_writer.isOpened():
             raise Exception("Video Writer Suddenly Failed!")
 
-        # Get the next frame
-        frame = video.get_frame()
-
-        # Resize frame or else the video will break
-        frame = cv2.resize(frame, (width, height))
+        # Get the next frame. Frame must be the same size as the writer or else the video will break
+        frame = video.get_derived(size=(width, height))
 
         # Write the frame to file
         video_writer.write(frame)
@@ -71,10 +83,465 @@ def write_video(
     # video_writer.release()
 
 
-# TODO: This might cause data loss if the program is closed during video write. Ill look into it later.
+# Records the video in a background thread. Returns the VideoRecorder, which should be stopped to finalize the file
+# VideoRecorder has the same join() and is_alive() methods as the Thread this used to return
 def threaded_video_writer(*args, **kwargs):
-    # Create a new video writer thread
-    video_writer_thread = Thread(target=write_video, args=args, kwargs=kwargs)
-    video_writer_thread.daemon = True
-    video_writer_thread.start()
-    return video_writer_thread
+    return VideoRecorder(*args, **kwargs)
+
+
+class VideoRecorder():
+    """
+    Records a video to file in the background.
+    Frames are passed to a dedicated encoder thread through a bounded queue, and files can be split into chunks.
+    """
+
+    def __init__(
+        self,
+        video: AbstractVideo,
+        filename: str,
+        encoding: Optional[str | tuple | int] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        max_fps: Optional[float] = None,
+        print_fps: bool = False,
+        queue_size: int = 64,
+        chunk_minutes: Optional[float] = None,
+        chunk_megabytes: Optional[float] = None,
+    ):
+        # Basic Recorder Properties
+        self.video: AbstractVideo = video
+        self.filename: str = filename
+        self.width: int = width or video.width
+        self.height: int = height or video.height
+        self.max_fps: float = max_fps or video.max_fps
+        self.fourcc: int = get_video_fourcc(filename, encoding)
+        # Chunking Properties -> Start a new file every x minutes or every x megabytes
+        self.chunk_minutes: Optional[float] = chunk_minutes
+        self.chunk_megabytes: Optional[float] = chunk_megabytes
+
+        # Sanity Check
+        if queue_size <= 0:
+            raise ValueError("Queue Size must be greater than 0!")
+        if math.isinf(self.max_fps):
+            raise ValueError("Video Recorder needs a finite FPS to record at!")
+
+        # Bounded Frame Queue -> Frames are dropped instead of stalling the capture thread if the encoder falls behind
+        self.frame_queue: Queue = Queue(maxsize=queue_size)
+        self.frame_controller = FrameController(self.max_fps, print_fps=print_fps)
+
+        # Current Output File
+        self.video_writer: Optional[cv2.VideoWriter] = None
+        self.current_filename: Optional[str] = None
+        self.chunk_index: int = 0
+        self.chunk_frames: int = 0
+        self.chunk_filenames: list[str] = []
+
+        # Recorder Statistics
+        self.start_time: float = time.time()
+        self.frames_received: int = 0
+        self.frames_written: int = 0
+        self.frames_dropped: int = 0
+        self.bytes_written: int = 0
+        self.write_time: float = 0.0
+        self.error: Optional[Exception] = None
+
+        # Open the first file, so encoding errors are raised immediately
+        self.open_chunk()
+
+        # Stop the recorder on exit, so the last file is not lost
+        self.stopped = Event()
+        atexit.register(self.stop)
+
+        # Start Capture and Encoder Threads
+        self.encoder_thread = Thread(target=self.encoder_loop, daemon=True)
+        self.encoder_thread.start()
+        self.capture_thread = Thread(target=self.capture_loop, daemon=True)
+        self.capture_thread.start()
+
+    # Get the filename of the current chunk. Chunk numbers are only added if chunking is enabled
+    def get_chunk_filename(self):
+        if self.chunk_minutes is None and self.chunk_megabytes is None:
+            return self.filename
+        path = Path(self.filename)
+        return str(path.with_name(f"{path.stem}_{self.chunk_index:04d}{path.suffix}"))
+
+    # Close the current file (if any) and start the next one
+    def open_chunk(self):
+        self.close_chunk()
+
+        # Create File Writer Object
+        self.current_filename = self.get_chunk_filename()
+        self.video_writer = cv2.VideoWriter(self.current_filename, self.fourcc, self.max_fps, (self.width, self.height))
+
+        # Sanity Check
+        if not self.video_writer.isOpened():
+            raise Exception(f"Video Writer Failed to Initialize for {self.current_filename}!")
+
+        self.chunk_filenames.append(self.current_filename)
+        self.chunk_index += 1
+        self.chunk_frames = 0
+
+    # Flush and release the current file
+    def close_chunk(self):
+        if self.video_writer is None:
+            return
+
+        self.video_writer.release()
+        self.video_writer = None
+        if os.path.exists(self.current_filename):
+            self.bytes_written += os.path.getsize(self.current_filename)
+        logging.info(f"Finished Recording {self.current_filename} ({self.chunk_frames} frames)")
+
+    # Check if the current file has reached its chunk duration or size
+    def chunk_full(self):
+        if self.chunk_minutes is not None and self.chunk_frames >= self.chunk_minutes * 60 * self.max_fps:
+            return True
+        if self.chunk_megabytes is not None and os.path.getsize(self.current_filename) >= self.chunk_megabytes * 1024 * 1024:
+            return True
+        return False
+
+    def capture_loop(self):
+        # Start Capture Loop
+        while not self.stopped.is_set():
+            try:
+                # Get the next frame. Frame must be the same size as the writer or else the video will break
+                frame = self.video.get_derived(size=(self.width, self.height))
+                self.frames_received += 1
+
+                # Send the frame to the encoder, or drop it if the encoder is behind
+                try:
+                    self.frame_queue.put_nowait(frame)
+                except Full:
+                    self.frames_dropped += 1
+            except Exception as e:
+                logging.error(f"Error While Capturing Frame for {self.filename}! {e}")
+                traceback.print_exc()
+            self.frame_controller.next_frame()
+
+        # Signal the encoder that no more frames are coming
+        self.frame_queue.put(None)
+
+    def encoder_loop(self):
+        # Start Encoder Loop
+        while True:
+            frame = self.frame_queue.get()
+
+            # Recorder was stopped and all queued frames were written
+            if frame is None:
+                break
+
+            try:
+                # Start a new file if the current one is full
+                if self.chunk_full():
+                    self.open_chunk()
+
+                # Sanity Check
+                if not self.video_writer.isOpened():
+                    raise Exception("Video Writer Suddenly Failed!")
+
+                # Write the frame to file
+                write_start = time.time()
+                self.video_writer.write(frame)
+                self.write_time += time.time() - write_start
+                self.chunk_frames += 1
+                self.frames_written += 1
+            except Exception as e:
+                logging.error(f"Error While Writing Frame to {self.current_filename}! Stopping Recorder. {e}")
+                traceback.print_exc()
+                self.error = e
+                self.stopped.set()
+                # Drain the queue so the capture thread is never stuck on it
+                while self.frame_queue.get() is not None:
+                    pass
+                break
+
+        # Flush the last file
+        self.close_chunk()
+
+    # Stop recording, write all queued frames, and release the file
+    def stop(self, timeout: Optional[float] = None):
+        if not self.stopped.is_set():
+            self.stopped.set()
+            logging.info(f"Stopping Video Recorder for {self.filename}")
+        self.encoder_thread.join(timeout)
+        atexit.unregister(self.stop)
+
+    def is_recording(self):
+        return not self.stopped.is_set() and self.encoder_thread.is_alive()
+
+    # Thread API, so the recorder can be used like the thread returned by older versions of threaded_video_writer
+    # Waits until the recorder is stopped and the last file is written
+    def join(self, timeout: Optional[float] = None):
+        self.encoder_thread.join(timeout)
+
+    def is_alive(self):
+        return self.encoder_thread.is_alive()
+
+    @property
+    def daemon(self):
+        return self.encoder_thread.daemon
+
+    # Get the throughput of the recorder
+    def get_stats(self):
+        elapsed = time.time() - self.start_time
+        # Include the size of the file that is currently being written
+        bytes_written = self.bytes_written
+        if self.video_writer is not None and os.path.exists(self.current_filename):
+            bytes_written += os.path.getsize(self.current_filename)
+        return {
+            "frames_received": self.frames_received,
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "queue_size": self.frame_queue.qsize(),
+            "chunks": len(self.chunk_filenames),
+            "bytes_written": bytes_written,
+            "write_fps": self.frames_written / elapsed if elapsed else 0.0,
+            "average_write_time": self.write_time / self.frames_written if self.frames_written else 0.0,
+            "write_capacity_fps": self.frames_written / self.write_time if self.write_time else math.inf,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class MotionRecorder():
+    """
+    Records a video to file only when there is motion.
+    The last few seconds before motion are kept compressed in memory, so each recording starts before the motion does.
+    """
+
+    def __init__(
+        self,
+        video: AbstractVideo,
+        filename: str,
+        encoding: Optional[str | tuple | int] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        max_fps: Optional[float] = None,
+        pre_roll: float = 5.0,
+        post_roll: float = 5.0,
+        motion_threshold: float = 0.01,
+        pixel_threshold: int = 25,
+        motion_width: int = 64,
+        jpeg_quality: int = 80,
+        queue_size: int = 64,
+    ):
+        # Basic Recorder Properties
+        self.video: AbstractVideo = video
+        self.filename: str = filename
+        self.width: int = width or video.width
+        self.height: int = height or video.height
+        self.max_fps: float = max_fps or video.max_fps
+        self.fourcc: int = get_video_fourcc(filename, encoding)
+        # Motion Detection Properties
+        # pre_roll / post_roll -> Seconds to record before and after motion
+        # motion_threshold -> Fraction of pixels that need to change to count as motion
+        # pixel_threshold -> How much a pixel needs to change (0-255) to count as changed
+        self.pre_roll: float = pre_roll
+        self.post_roll: float = post_roll
+        self.motion_threshold: float = motion_threshold
+        self.pixel_threshold: int = pixel_threshold
+        self.motion_size: tuple[int, int] = (motion_width, max(round(motion_width * video.height / video.width), 1))
+        self.jpeg_quality: int = jpeg_quality
+
+        # Sanity Check
+        if queue_size <= 0:
+            raise ValueError("Queue Size must be greater than 0!")
+        if math.isinf(self.max_fps):
+            raise ValueError("Motion Recorder needs a finite FPS to record at!")
+
+        # Bounded Frame Queue -> Holds (timestamp, frame, motion) tuples for the recorder thread
+        self.frame_queue: Queue = Queue(maxsize=queue_size)
+        # Pre-Roll Buffer -> Holds (timestamp, jpeg) tuples of the last pre_roll seconds of frames
+        self.pre_roll_buffer: deque = deque()
+        # Last downscaled grayscale frame, used to detect motion
+        self.previous_motion_frame: Optional[np.ndarray] = None
+        # Frames are only queued at max_fps. Motion seen in skipped frames is carried over to the next queued frame
+        self.next_frame_time: float = 0.0
+        self.pending_motion: bool = False
+
+        # Current Recording
+        self.video_writer: Optional[cv2.VideoWriter] = None
+        self.current_filename: Optional[str] = None
+        self.last_motion: float = 0.0
+        # Timestamp of the first frame and number of frames written in the current recording
+        self.recording_start: float = 0.0
+        self.recording_frames: int = 0
+        self.segment_filenames: list[str] = []
+
+        # Recorder Statistics
+        self.frames_received: int = 0
+        self.frames_dropped: int = 0
+        self.frames_throttled: int = 0
+        self.frames_written: int = 0
+        self.motion_frames: int = 0
+
+        # Stop the recorder on exit, so the last recording is not lost
+        self.stopped = Event()
+        atexit.register(self.stop)
+
+        # Start Recorder Thread and watch the video for new frames
+        self.recorder_thread = Thread(target=self.recorder_loop, daemon=True)
+        self.recorder_thread.start()
+        self.video.add_frame_subscriber(self.motion_subscriber)
+
+    # Get the fraction of pixels that changed since the last frame
+    def get_motion(self, video):
+        # Downscaled grayscale frames are shared with other readers of the video
+        motion_frame = video.get_derived(size=self.motion_size, color="gray")
+        previous_motion_frame = self.previous_motion_frame
+        self.previous_motion_frame = motion_frame
+        if previous_motion_frame is None:
+            return 0.0
+
+        difference = cv2.absdiff(motion_frame, previous_motion_frame)
+        _, changed = cv2.threshold(difference, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(changed) / changed.size
+
+    # Called by the video thread for every new frame. Only motion detection is done here, everything else is done by the recorder thread
+    def motion_subscriber(self, video):
+        if self.stopped.is_set():
+            return
+
+        self.pending_motion = self.get_motion(video) >= self.motion_threshold or self.pending_motion
+        self.frames_received += 1
+
+        # Skip frames that come in faster than max_fps, so the pre-roll and recordings match real time
+        timestamp = time.time()
+        interval = 1 / self.max_fps
+        if timestamp < self.next_frame_time - interval / 4:
+            self.frames_throttled += 1
+            return
+        self.next_frame_time = max(self.next_frame_time + interval, timestamp + interval / 2)
+
+        motion = self.pending_motion
+        self.pending_motion = False
+        try:
+            self.frame_queue.put_nowait((timestamp, video.get_derived(), motion))
+        except Full:
+            self.frames_dropped += 1
+
+    # Get the filename for a new recording, based on the time the recording started
+    def get_segment_filename(self, timestamp: float):
+        path = Path(self.filename)
+        return str(path.with_name(f"{path.stem}_{time.strftime('%Y%m%d_%H%M%S', time.localtime(timestamp))}{path.suffix}"))
+
+    # Start a new recording, and write all frames in the pre-roll buffer to it
+    def start_recording(self, timestamp: float):
+        # Create File Writer Object
+        self.current_filename = self.get_segment_filename(timestamp)
+        self.video_writer = cv2.VideoWriter(self.current_filename, self.fourcc, self.max_fps, (self.width, self.height))
+
+        # Sanity Check
+        if not self.video_writer.isOpened():
+            raise Exception(f"Video Writer Failed to Initialize for {self.current_filename}!")
+
+        logging.info(f"Motion Detected! Recording to {self.current_filename}")
+        self.segment_filenames.append(self.current_filename)
+
+        # The recording starts at the oldest frame in the pre-roll
+        self.recording_start = self.pre_roll_buffer[0][0] if self.pre_roll_buffer else timestamp
+        self.recording_frames = 0
+
+        # Write the pre-roll, decoding each frame
+        while self.pre_roll_buffer:
+            frame_timestamp, encoded = self.pre_roll_buffer.popleft()
+            self.write_frame(cv2.imdecode(encoded, cv2.IMREAD_COLOR), frame_timestamp)
+
+    # Flush and release the current recording
+    def stop_recording(self):
+        if self.video_writer is None:
+            return
+
+        self.video_writer.release()
+        self.video_writer = None
+        logging.info(f"Finished Recording {self.current_filename}")
+
+    # Write a frame as many times as needed to keep the recording in sync with real time, so it plays back at the right speed
+    # Frames from a source slower than max_fps are repeated, and extra frames from a faster source are skipped
+    # Gaps in the source (stalled camera, paused video, etc) are only filled for up to post_roll seconds, and the rest is cut out
+    def write_frame(self, frame: np.ndarray, timestamp: float):
+        target_frames = round((timestamp - self.recording_start) * self.max_fps) + 1
+        max_fill = max(round(self.post_roll * self.max_fps), 1)
+        if target_frames - self.recording_frames > max_fill:
+            self.recording_start += (target_frames - self.recording_frames - max_fill) / self.max_fps
+            target_frames = self.recording_frames + max_fill
+        while self.recording_frames < target_frames:
+            self.video_writer.write(frame)
+            self.recording_frames += 1
+            self.frames_written += 1
+
+    def recorder_loop(self):
+        # Start Recorder Loop
+        while True:
+            queued = self.frame_queue.get()
+
+            # Recorder was stopped and all queued frames were handled
+            if queued is None:
+                break
+
+            try:
+                timestamp, frame, motion = queued
+                if motion:
+                    self.motion_frames += 1
+                    self.last_motion = timestamp
+
+                # Frame must be the same size as the writer or else the video will break
+                if (frame.shape[1], frame.shape[0]) != (self.width, self.height):
+                    frame = cv2.resize(frame, (self.width, self.height))
+
+                # Start recording on motion
+                if motion and self.video_writer is None:
+                    self.start_recording(timestamp)
+
+                if self.video_writer is not None:
+                    self.write_frame(frame, timestamp)
+                    # Stop recording once there has been no motion for a while
+                    if timestamp - self.last_motion > self.post_roll:
+                        self.stop_recording()
+                else:
+                    # Keep the frame as pre-roll, compressed to save memory
+                    _, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                    self.pre_roll_buffer.append((timestamp, encoded))
+                    # Only keep the last pre_roll seconds of frames
+                    while self.pre_roll_buffer[0][0] < timestamp - self.pre_roll:
+                        self.pre_roll_buffer.popleft()
+            except Exception as e:
+                logging.error(f"Error While Recording Motion to {self.filename}! {e}")
+                traceback.print_exc()
+                self.stop_recording()
+
+        # Flush the last recording
+        self.stop_recording()
+
+    # Stop watching for motion, and finish the current recording
+    def stop(self, timeout: Optional[float] = None):
+        if not self.stopped.is_set():
+            self.stopped.set()
+            logging.info(f"Stopping Motion Recorder for {self.filename}")
+            if self.motion_subscriber in self.video.frame_subscribers:
+                self.video.frame_subscribers.remove(self.motion_subscriber)
+            self.frame_queue.put(None)
+        self.recorder_thread.join(timeout)
+        atexit.unregister(self.stop)
+
+    def is_recording(self):
+        return self.video_writer is not None
+
+    # Get the statistics of the recorder
+    def get_stats(self):
+        return {
+            "frames_received": self.frames_received,
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "frames_throttled": self.frames_throttled,
+            "motion_frames": self.motion_frames,
+            "queue_size": self.frame_queue.qsize(),
+            "pre_roll_frames": len(self.pre_roll_buffer),
+            "pre_roll_bytes": sum(encoded.nbytes for _, encoded in list(self.pre_roll_buffer)),
+            "recording": self.is_recording(),
+            "segments": list(self.segment_filenames),
+        }
@@ -1,4 +1,23 @@
-from wormhole.viewer.abstractviewer import *
-from wormhole.viewer.socketioviewer import *
-from wormhole.viewer.mjpegviewer import *
-from wormhole.viewer.rawviewer import *
+from wormhole.lazyimport import create_lazy_importer
+
+# Submodule each name is defined in. Submodules are only imported once one of their names is used
+lazy_names = {
+    # Abstract Viewer
+    "AbstractViewer": "abstractviewer",
+    "REDUCED_DECODE_FLAGS": "abstractviewer",
+    # SocketIO Viewers
+    "SocketIOViewerBase": "socketioviewer",
+    "SharedSocketIOConnection": "socketioviewer",
+    "SocketIOConnectionManager": "socketioviewer",
+    "RawViewer": "rawviewer",
+    "RawIMDecodeViewerBase": "rawviewer",
+    "RawJPEGViewer": "rawviewer",
+    "RawPNGViewer": "rawviewer",
+    "RawImageFormatViewer": "rawviewer",
+    # HTTP Viewers
+    "MJPEGViewer": "mjpegviewer",
+    "BufferedMJPEGViewer": "mjpegviewer",
+    "MJPEGStreamParser": "mjpegviewer",
+}
+__all__ = list(lazy_names)
+__getattr__, __dir__ = create_lazy_importer(__name__, lazy_names)
@@ -1,14 +1,159 @@
 from wormhole.video import AbstractVideo
 
+import cv2
+import numpy as np
+import time
+from threading import Condition, Lock, Thread
+from typing import Any, Optional
+
+
+# Scale to decode JPEG images at -> cv2 imread flag
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
 
 class AbstractViewer(AbstractVideo):
     """
     General Abstract Viewer Class for Wormhole. 
+    Received payloads are decoded by decode workers, which only decode the newest payload and skip stale ones.
     """
 
     def __init__(
         self,
         *args,
+        decode_workers: int = 1,
+        reduced_decode: bool = True,
         **kwargs
     ):
         super().__init__(*args, **kwargs)
+
+        # Sanity Check
+        if decode_workers < 1:
+            raise ValueError("Decode Workers must be at least 1!")
+
+        # Decode Worker Properties
+        self.decode_workers: int = decode_workers
+        self.decode_worker_threads: list[Thread] = []
+        # Newest Received Payload -> (sequence, payload). Replaced if a newer payload arrives before it is decoded
+        self.pending_payload: Optional[tuple[int, Any]] = None
+        self.payload_condition = Condition()
+        self.payload_sequence: int = 0
+        # Sequence of the last published frame, so workers never publish an older frame over a newer one
+        self.published_sequence: int = -1
+        self.publish_lock = Lock()
+
+        # Reduced Decode -> Decode JPEG images at 1/2, 1/4, or 1/8 scale when the viewer is smaller than the stream
+        self.reduced_decode: bool = reduced_decode
+        # Full size of the stream (width, height), found from the last decoded image
+        self.stream_size: Optional[tuple[int, int]] = None
+
+        # Decoder Statistics
+        self.frames_received: int = 0
+        self.frames_decoded: int = 0
+        self.frames_skipped: int = 0
+        self.decode_time: float = 0.0
+
+        # Set once the viewer is closed, so receiving threads know to stop
+        self.closed: bool = False
+
+    # Called by the receiving thread. Stores the newest payload for the decode workers
+    def submit_payload(self, payload: Any):
+        with self.payload_condition:
+            # Start the decode workers on the first payload
+            if not self.decode_worker_threads:
+                for _ in range(self.decode_workers):
+                    decode_worker_thread = Thread(target=self.decode_worker, daemon=True)
+                    decode_worker_thread.start()
+                    self.decode_worker_threads.append(decode_worker_thread)
+
+            # The previous payload was never decoded, so it is skipped
+            if self.pending_payload is not None:
+                self.frames_skipped += 1
+            self.pending_payload = (self.payload_sequence, payload)
+            self.payload_sequence += 1
+            self.frames_received += 1
+            self.payload_condition.notify()
+
+    # Decode a payload into a frame. Implemented by each viewer
+    def decode_payload(self, payload: Any):
+        raise NotImplementedError()
+
+    # Get the largest scale that the stream can be reduced by while still being at least the size of the viewer
+    def get_decode_scale(self):
+        if self.stream_size is None:
+            return 1
+        stream_width, stream_height = self.stream_size
+        for scale in (8, 4, 2):
+            if stream_width // scale >= self.width and stream_height // scale >= self.height:
+                return scale
+        return 1
+
+    # Decode an encoded image and resize it to the size of the viewer
+    def decode_image(self, data: bytes):
+        # JPEG images can be decoded at a lower resolution directly, which is a lot faster than resizing afterwards
+        scale = 1
+        if self.reduced_decode and data[:2] == b"\xff\xd8":
+            scale = self.get_decode_scale()
+
+        new_frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), REDUCED_DECODE_FLAGS[scale])
+        if new_frame is None:
+            raise Exception("Failed to decode image frame!")
+
+        # Remember the full size of the stream to pick the scale of the next image
+        frame_height, frame_width, _ = new_frame.shape
+        self.stream_size = (frame_width * scale, frame_height * scale)
+
+        # If sizes does not match, resize frame
+        if frame_width != self.width or frame_height != self.height:
+            new_frame = cv2.resize(new_frame, (self.width, self.height))
+
+        return new_frame
+
+    def decode_worker(self):
+        while True:
+            # Wait for the newest payload
+            with self.payload_condition:
+                self.payload_condition.wait_for(lambda: self.pending_payload is not None or self.closed)
+                # Stop the worker once the viewer is closed
+                if self.closed:
+                    return
+                sequence, payload = self.pending_payload  # type: ignore
+                self.pending_payload = None
+
+            try:
+                decode_start = time.time()
+                new_frame = self.decode_payload(payload)
+                self.decode_time += time.time() - decode_start
+
+                with self.publish_lock:
+                    # Another worker already published a newer frame
+                    if sequence < self.published_sequence:
+                        self.frames_skipped += 1
+                        continue
+                    self.published_sequence = sequence
+                    self.frames_decoded += 1
+
+                    # Set the new frame
+                    self.set_frame(new_frame)
+            except Exception as e:
+                self.handle_render_error(e, message="Error While Decoding Stream!")
+
+    # Get the statistics of the decode workers
+    def get_decoder_stats(self):
+        return {
+            "decode_workers": self.decode_workers,
+            "frames_received": self.frames_received,
+            "frames_decoded": self.frames_decoded,
+            "frames_skipped": self.frames_skipped,
+            "average_decode_time": self.decode_time / self.frames_decoded if self.frames_decoded else 0.0,
+        }
+
+    # Stop viewing the stream
+    def close(self):
+        with self.payload_condition:
+            self.closed = True
+            self.payload_condition.notify_all()
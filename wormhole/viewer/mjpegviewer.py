@@ -6,6 +6,7 @@ import logging
 import numpy as np
 import urllib.request
 from threading import Thread
+from typing import Optional
 
 
 class MJPEGViewer(AbstractViewer):
@@ -42,7 +43,7 @@ class MJPEGViewer(AbstractViewer):
 
     def video_decoder(self):
         # Start Video Loop
-        while True:
+        while not self.closed:
             try:
                 # Read Frame
                 ret, frame = self.cap.read()
@@ -67,9 +68,11 @@ class MJPEGViewer(AbstractViewer):
 
                 # Set Frame
                 self.set_frame(frame)
+                self.frames_decoded += 1
                 self.frame_controller.next_frame()
             except Exception as e:
                 self.handle_render_error(e, message="Error While Processing/Opening Motion JPEG stream!")
+        self.cap.release()
 
 
 class BufferedMJPEGViewer(AbstractViewer):
@@ -94,45 +97,161 @@ class BufferedMJPEGViewer(AbstractViewer):
         # Save advanced variables about stream
         self.read_buffer_size = read_buffer_size
 
-        # Start the video decoder in another thread
-        self.video_decoder_thread = Thread(target=self.video_decoder, daemon=True)
-        self.video_decoder_thread.start()
-
         # Create Object
         super().__init__(width, height, max_fps, **kwargs)
 
-    # Video Decoder Thread
-    def video_decoder(self):
-        while True:
+        # Start the video receiver in another thread. Frames are decoded by the decode workers
+        self.video_receiver_thread = Thread(target=self.video_receiver, daemon=True)
+        self.video_receiver_thread.start()
+
+    # Video Receiver Thread
+    def video_receiver(self):
+        while not self.closed:
             try:
                 with urllib.request.urlopen(self.url) as stream:
-                    # Read jpeg image from stream
-                    inBytes = bytes()
-
-                    # TODO: Find a way to make this faster
-                    while True:
-                        # Find start and end of image file
-                        inBytes += stream.read(self.read_buffer_size)
-                        a = inBytes.find(b'\xff\xd8')
-                        b = inBytes.find(b'\xff\xd9')
-                        if a != -1 and b != -1:
-                            # Extract image from stream
-                            jpg = inBytes[a:b + 2]
-                            inBytes = inBytes[b + 2:]
-
-                            # Decode Image
-                            np_image = np.fromstring(jpg, dtype=np.uint8)  # type: ignore
-                            new_frame = cv2.imdecode(np_image, cv2.IMREAD_COLOR)
-
-                            # If sizes does not match, resize frame
-                            frame_height, frame_width, _ = new_frame.shape
-                            if frame_width != self.width or frame_height != self.height:
-                                new_frame = cv2.resize(new_frame, (self.width, self.height))
-
-                            # Set the frame information
-                            self.set_frame(new_frame)
-                            self.frame_controller.next_frame()
-
-            # Catch any errors that may occur in the video decoder
+                    # Read each jpeg image from the multipart stream
+                    parser = MJPEGStreamParser(stream, boundary=stream.headers.get_param("boundary"), read_buffer_size=self.read_buffer_size)
+                    for jpg in parser:
+                        if self.closed:
+                            break
+                        # The parser reuses its buffer, so the image is copied before it is passed to the decode workers
+                        self.submit_payload(bytes(jpg))
+                        self.frame_controller.next_frame()
+
+            # Catch any errors that may occur in the video receiver
             except Exception as e:
                 self.handle_render_error(e, message="Error While Processing/Opening Motion JPEG stream!")
+
+    # Decode a received jpeg image
+    def decode_payload(self, jpg: bytes):
+        return self.decode_image(jpg)
+
+
+class MJPEGStreamParser():
+    """
+    Streaming parser for multipart Motion JPEG streams.
+    Parts are found using the multipart boundary and read using their Content-Length, so the payload is never searched.
+    Each part is returned as a memoryview into a reused buffer, which is only valid until the next part is read.
+    """
+
+    def __init__(
+        self,
+        stream,
+        boundary: Optional[str] = None,
+        read_buffer_size: int = 1024
+    ):
+        # Stream must support readline and readinto
+        self.stream = stream
+        # Multipart delimiter line. If the boundary is unknown, the first delimiter line in the stream is used
+        self.delimiter: Optional[bytes] = b"--" + boundary.encode("latin-1") if boundary else None
+        # Set if the delimiter of the next part was already read
+        self.delimiter_read: bool = False
+
+        # Reused Read Buffer -> Grows to fit the largest part
+        self.buffer = bytearray(max(read_buffer_size, 1))
+        self.view = memoryview(self.buffer)
+
+        # Parser Statistics
+        self.parts_read: int = 0
+        self.bytes_read: int = 0
+
+    def __iter__(self):
+        while True:
+            part = self.read_part()
+            if part is None:
+                return
+            yield part
+
+    # Make sure the buffer can fit the given number of bytes. Existing data is kept
+    def ensure_buffer_size(self, size: int, keep: int = 0):
+        if size <= len(self.buffer):
+            return
+        # A new buffer is created instead of resizing, as the old buffer may still be referenced
+        new_buffer = bytearray(max(size, len(self.buffer) * 2))
+        new_buffer[:keep] = self.view[:keep]
+        self.buffer = new_buffer
+        self.view = memoryview(self.buffer)
+
+    # Read until the start of the next part
+    def read_delimiter(self):
+        if self.delimiter_read:
+            self.delimiter_read = False
+            return True
+
+        while True:
+            line = self.stream.readline()
+            if not line:
+                return False
+            line = line.strip()
+            # Boundary is unknown. Skip everything before the first delimiter line
+            if self.delimiter is None:
+                if line.startswith(b"--"):
+                    self.delimiter = line
+                    return True
+                continue
+            if line == self.delimiter:
+                return True
+            # Final delimiter marks the end of the stream
+            if line == self.delimiter + b"--":
+                return False
+
+    # Read the headers of the current part. Returns the content length, or None if it was not sent
+    def read_headers(self):
+        content_length = None
+        while True:
+            line = self.stream.readline()
+            if not line:
+                raise EOFError("Stream ended while reading part headers!")
+            line = line.strip()
+            if not line:
+                return content_length
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                content_length = int(value.strip())
+
+    # Read exactly the given number of bytes into the start of the buffer
+    def read_exactly(self, size: int):
+        self.ensure_buffer_size(size)
+        received = 0
+        while received < size:
+            count = self.stream.readinto(self.view[received:size])
+            if not count:
+                raise EOFError("Stream ended while reading part!")
+            received += count
+        return self.view[:size]
+
+    # Read the part until the next delimiter, for streams that do not send a Content-Length
+    def read_until_delimiter(self):
+        size = 0
+        while True:
+            line = self.stream.readline()
+            if not line:
+                raise EOFError("Stream ended while reading part!")
+            if line.startswith(self.delimiter) and line.rstrip() in (self.delimiter, self.delimiter + b"--"):
+                self.delimiter_read = line.rstrip() == self.delimiter
+                break
+            self.ensure_buffer_size(size + len(line), keep=size)
+            self.view[size:size + len(line)] = line
+            size += len(line)
+
+        # Remove the line break before the delimiter
+        if self.view[size - 2:size] == b"\r\n":
+            size -= 2
+        elif self.view[size - 1:size] == b"\n":
+            size -= 1
+        return self.view[:size]
+
+    # Read the next part of the stream. Returns None if the stream ended
+    def read_part(self):
+        if not self.read_delimiter():
+            return None
+
+        content_length = self.read_headers()
+        if content_length is not None:
+            part = self.read_exactly(content_length)
+        else:
+            part = self.read_until_delimiter()
+
+        self.parts_read += 1
+        self.bytes_read += len(part)
+        return part
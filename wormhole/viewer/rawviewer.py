@@ -1,6 +1,5 @@
 from wormhole.viewer import SocketIOViewerBase
 
-import cv2
 import numpy as np
 
 
@@ -29,6 +28,7 @@ class RawViewer(SocketIOViewerBase):
 
             # New Frame!
             self.set_frame(new_frame)
+            self.frames_decoded += 1
         except Exception as e:
             self.handle_render_error(e, message="Error While Reading/Processing RAW stream!")
 
@@ -47,21 +47,13 @@ class RawIMDecodeViewerBase(SocketIOViewerBase):
         super().__init__(self.raw_image_handler, *args, **kwargs)
 
     # Create Handler for Incoming Raw Data Frames
+    # Frames are only stored here, and decoded by the decode workers so the socket is never blocked
     def raw_image_handler(self, raw):
-        try:
-            # Read and decode data
-            np_image = np.fromstring(raw, dtype=np.uint8)  # type: ignore
-            new_frame = cv2.imdecode(np_image, cv2.IMREAD_COLOR)
-
-            # If sizes does not match, resize frame
-            frame_height, frame_width, _ = new_frame.shape
-            if frame_width != self.width or frame_height != self.height:
-                new_frame = cv2.resize(new_frame, (self.width, self.height))
+        self.submit_payload(raw)
 
-            # Set the new frame
-            self.set_frame(new_frame)
-        except Exception as e:
-            self.handle_render_error(e, message="Error While Reading/Processing raw image stream!")
+    # Decode a received image
+    def decode_payload(self, raw):
+        return self.decode_image(raw)
 
 # Proxy classes for each of the supported streaming formats.
 # They all run the exact same thing, but this is here so it fits with the API structure
@@ -1,11 +1,171 @@
 from wormhole.viewer import AbstractViewer
 
+import logging
 import math
 import socketio
+import time
+from socketio import packet
+from threading import Lock
 from typing import Callable, Optional
 from urllib.parse import urlparse
 
 
+# Private python-socketio client internals used to join and leave namespaces on a live connection
+# python-socketio is pinned in requirements.txt, and these are checked when a shared connection is created
+SOCKETIO_CLIENT_INTERNALS = ["_send_packet", "packet_class", "connection_namespaces", "namespaces", "failed_namespaces"]
+
+
+class SharedSocketIOConnection():
+    """
+    A single SocketIO Client that is shared between every viewer on the same host.
+    Each stream is its own namespace on the connection, and frames are dispatched to the viewers of that namespace.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        socketio_args: Optional[dict] = None,
+        connect_timeout: float = 5
+    ):
+        self.hostname = hostname
+        self.connect_timeout = connect_timeout
+
+        # Setup SocketIO Client
+        self.sio_client = socketio.Client(**socketio_args if socketio_args else {})
+
+        # Fail loudly if the installed python-socketio does not have the internals used to share connections
+        missing_internals = [name for name in SOCKETIO_CLIENT_INTERNALS if not hasattr(self.sio_client, name)]
+        if missing_internals or not hasattr(packet, "CONNECT") or not hasattr(packet, "DISCONNECT"):
+            raise Exception(f"Installed python-socketio Version Does Not Support Shared Connections! Missing: {missing_internals}. Install the version in requirements.txt or pass shared_connection=False")
+
+        # Frame handlers for each namespace. Replaced (not modified) on change so dispatching does not need the lock
+        self.handlers: dict[str, tuple[Callable, ...]] = {}
+        self.lock = Lock()
+
+        # Catch-all handler, so frames from every namespace go through one dispatcher
+        self.sio_client.on("frame", self.dispatch_frame, namespace="*")
+
+    def dispatch_frame(self, namespace: str, data):
+        for handler in self.handlers.get(namespace, ()):
+            handler(data)
+
+    # Add a frame handler to a namespace, joining the namespace if needed
+    def add_handler(self, namespace: str, handler: Callable):
+        with self.lock:
+            if namespace not in self.handlers:
+                self.join_namespace(namespace)
+            self.handlers[namespace] = self.handlers.get(namespace, ()) + (handler, )
+
+    # Remove a frame handler from a namespace, leaving the namespace if no handlers are left
+    # Returns True if the handler was removed
+    def remove_handler(self, namespace: str, handler: Callable):
+        with self.lock:
+            if handler not in self.handlers.get(namespace, ()):
+                return False
+
+            handlers = tuple(h for h in self.handlers[namespace] if h != handler)
+            if handlers:
+                self.handlers[namespace] = handlers
+                return True
+
+            del self.handlers[namespace]
+            if self.sio_client.connected:
+                self.leave_namespace(namespace)
+            return True
+
+    def disconnect(self):
+        with self.lock:
+            if self.sio_client.connected:
+                self.sio_client.disconnect()
+
+    def join_namespace(self, namespace: str):
+        # Connect to the server with the first namespace
+        if not self.sio_client.connected:
+            self.sio_client.connect(self.hostname, namespaces=[namespace], wait_timeout=self.connect_timeout)
+            return
+
+        # SocketIO multiplexes namespaces over one connection, but the client only joins namespaces while connecting.
+        # Send the connect packet ourselves, and add it to the connection namespaces so it is joined again on reconnect
+        logging.debug(f"Joining namespace {namespace} on shared SocketIO connection to {self.hostname}")
+        self.sio_client.connection_namespaces = list(self.sio_client.connection_namespaces) + [namespace]
+        self.sio_client._send_packet(self.sio_client.packet_class(packet.CONNECT, data={}, namespace=namespace))
+
+        # Wait for the server to accept the namespace
+        timeout = time.time() + self.connect_timeout
+        while namespace not in self.sio_client.namespaces:
+            if namespace in self.sio_client.failed_namespaces or time.time() > timeout:
+                self.sio_client.connection_namespaces.remove(namespace)
+                raise Exception(f"Failed To Connect To Namespace {namespace} on {self.hostname}!")
+            time.sleep(0.01)
+
+    def leave_namespace(self, namespace: str):
+        logging.debug(f"Leaving namespace {namespace} on shared SocketIO connection to {self.hostname}")
+        if namespace in self.sio_client.connection_namespaces:
+            self.sio_client.connection_namespaces.remove(namespace)
+        self.sio_client.namespaces.pop(namespace, None)
+        self.sio_client._send_packet(self.sio_client.packet_class(packet.DISCONNECT, namespace=namespace))
+
+
+class SocketIOConnectionManager():
+    """
+    Keeps one shared SocketIO connection per host (and socketio arguments)
+    """
+
+    def __init__(self):
+        self.connections: dict[tuple[str, str], SharedSocketIOConnection] = {}
+        # Number of viewers using (or being added to) each connection
+        self.users: dict[tuple[str, str], int] = {}
+        # Only guards the connection and user counts. Connecting is done under the lock of each connection,
+        # so viewers on a slow host do not block viewers on other hosts
+        self.lock = Lock()
+
+    @staticmethod
+    def get_key(hostname: str, socketio_args: Optional[dict] = None):
+        return hostname, repr(sorted((socketio_args or {}).items()))
+
+    # Add a frame handler for a stream, and return the connection it was added to
+    def add_handler(self, hostname: str, namespace: str, handler: Callable, socketio_args: Optional[dict] = None):
+        key = self.get_key(hostname, socketio_args)
+        # Reserve the connection, so it is not disconnected while the viewer is being added to it
+        with self.lock:
+            connection = self.connections.get(key)
+            if connection is None:
+                connection = SharedSocketIOConnection(hostname, socketio_args)
+                self.connections[key] = connection
+            self.users[key] = self.users.get(key, 0) + 1
+
+        try:
+            connection.add_handler(namespace, handler)
+        except Exception:
+            self.release_connection(key, connection)
+            raise
+        return connection
+
+    # Remove the frame handler of a stream, and disconnect once no viewers are using the connection
+    def remove_handler(self, hostname: str, namespace: str, handler: Callable, socketio_args: Optional[dict] = None):
+        key = self.get_key(hostname, socketio_args)
+        with self.lock:
+            connection = self.connections.get(key)
+        if connection is not None and connection.remove_handler(namespace, handler):
+            self.release_connection(key, connection)
+
+    # Remove a user from a connection. The last user forgets and disconnects it
+    def release_connection(self, key: tuple[str, str], connection: SharedSocketIOConnection):
+        with self.lock:
+            if self.connections.get(key) is not connection:
+                return
+            self.users[key] -= 1
+            if self.users[key]:
+                return
+            del self.users[key]
+            del self.connections[key]
+        connection.disconnect()
+
+
+# Default connection manager shared by every SocketIO viewer
+socketio_connection_manager = SocketIOConnectionManager()
+
+
 class SocketIOViewerBase(AbstractViewer):
     """
     Base Class for Everything SocketIO Viewer
@@ -19,25 +179,46 @@ class SocketIOViewerBase(AbstractViewer):
         height: int,
         max_fps: float = math.inf,
         socketio_args: Optional[dict] = None,
+        shared_connection: bool = True,
+        connection_manager: Optional[SocketIOConnectionManager] = None,
         **kwargs
     ):
         # Save basic variables about stream
         parsed_url = urlparse(url)
         self.hostname = f"{parsed_url.scheme}://{parsed_url.netloc}"
         self.namespace = parsed_url.path
+        self.socketio_args = socketio_args
 
         # Save Raw Data Processing Function
         self.data_processor = data_processor
 
-        # Setup SocketIO Client
-        self.sio_client = socketio.Client(**socketio_args if socketio_args else {})
+        # Share one connection between all viewers on the same host, with each stream as its own namespace
+        self.connection_manager: Optional[SocketIOConnectionManager] = None
+        if shared_connection:
+            self.connection_manager = connection_manager or socketio_connection_manager
 
         # Initiate Video Parent Object
         super().__init__(width, height, max_fps=max_fps, **kwargs)
 
-        # Create SocketIO Handler for when raw images stream in
-        # Proxying the function with a lambda so that the self context is also passed in
-        self.sio_client.on("frame", self.data_processor, namespace=self.namespace)
+        if self.connection_manager is not None:
+            # Connect To Server
+            connection = self.connection_manager.add_handler(self.hostname, self.namespace, self.data_processor, socketio_args=self.socketio_args)
+            self.sio_client = connection.sio_client
+        else:
+            # Setup SocketIO Client
+            self.sio_client = socketio.Client(**socketio_args if socketio_args else {})
+
+            # Create SocketIO Handler for when raw images stream in
+            # Proxying the function with a lambda so that the self context is also passed in
+            self.sio_client.on("frame", self.data_processor, namespace=self.namespace)
+
+            # Connect To Server
+            self.sio_client.connect(self.hostname, namespaces=[self.namespace])
 
-        # Connect To Server
-        self.sio_client.connect(self.hostname, namespaces=[self.namespace])
+    # Stop viewing the stream
+    def close(self):
+        super().close()
+        if self.connection_manager is not None:
+            self.connection_manager.remove_handler(self.hostname, self.namespace, self.data_processor, socketio_args=self.socketio_args)
+        else:
+            self.sio_client.disconnect()